@@ -0,0 +1,72 @@
+"""
+Generation throughput of chat_with_<model>_batch against calling the pipeline
+one conversation at a time, as chat_with_gams / chat_with_gemma_stateless do.
+GAMS_MODEL_ID / GEMMA_MODEL_ID select a smaller checkpoint for a CPU run.
+Run from the project root:
+    python -m Benchmarks.batchedGeneration [gams|gemma] [n_prompts] [batch_size] [new_tokens]
+"""
+import importlib
+import random
+import sys
+import threading
+import time
+from Benchmarks.syntheticRtf import WORDS
+from LLMs.batching import DynamicBatcher, build_conversations, generate_chats
+
+
+def check_batcher():
+    """Every caller must get the reply to its own prompt, whatever batch it landed in."""
+    sizes = []
+
+    def echo(prompts, instructions):
+        sizes.append(len(prompts))
+        time.sleep(0.01)
+        return [f"{inst}|{prompt}" for prompt, inst in zip(prompts, instructions)]
+
+    batcher = DynamicBatcher(echo, max_batch_size=4, max_wait=0.02)
+    results = {}
+
+    def caller(i):
+        results[i] = batcher.submit(f"prompt {i}", f"rank {i % 10}").result()
+
+    threads = [threading.Thread(target=caller, args=(i,)) for i in range(50)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    batcher.stop()
+    assert results == {i: f"rank {i % 10}|prompt {i}" for i in range(50)}
+    assert max(sizes) <= 4 and sum(sizes) == 50
+    print(f"DynamicBatcher: 50 callers got their own replies from {len(sizes)} batches")
+
+
+def run(model_name: str = "gams", n_prompts: int = 10, batch_size: int = 10, new_tokens: int = 64):
+    check_batcher()
+
+    module = importlib.import_module("LLMs.gaMS" if model_name == "gams" else "LLMs.gemma")
+    chat_batch = module.chat_with_gams_batch if model_name == "gams" else module.chat_with_gemma_batch
+    rng = random.Random(0)
+    prompts = [" ".join(rng.choice(WORDS) for _ in range(rng.randint(20, 120))) for _ in range(n_prompts)]
+    # Greedy with a fixed length, so both paths generate exactly the same number of tokens
+    settings = dict(max_new_tokens=new_tokens, min_new_tokens=new_tokens, do_sample=False, temperature=None,
+                    eos_token_id=module.eos_token_id, pad_token_id=module.tokenizer.pad_token_id)
+
+    start = time.perf_counter()
+    single = [generate_chats(module.pipe, [conversation], 1, **settings)[0]
+              for conversation in build_conversations(prompts, "Navodila.")]
+    single_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batched = chat_batch(prompts, "Navodila.", batch_size=batch_size, **settings)
+    batched_time = time.perf_counter() - start
+
+    same = sum(a == b for a, b in zip(single, batched))
+    total = n_prompts * new_tokens
+    print(f"{same}/{n_prompts} greedy replies identical to the one-at-a-time path")
+    print(f"one at a time:       {total / single_time:8.1f} tokens/s")
+    print(f"batched (size {batch_size:>3}): {total / batched_time:8.1f} tokens/s ({single_time / batched_time:.1f}x)")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    run(args[0] if args else "gams", *(int(a) for a in args[1:4]))
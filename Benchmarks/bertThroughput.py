@@ -0,0 +1,44 @@
+"""
+Pairs/second of BertScorer against one bert_score.score call per pair, as
+calculate_bert used to do, on CPU.
+Run from the project root: python -m Benchmarks.bertThroughput [model_type] [num_layers] [n_pairs]
+"""
+import random
+import sys
+import time
+from bert_score import score as bert_scorer
+from Benchmarks.syntheticRtf import WORDS
+from Scores.bert import BERT_MODEL_TYPE, BertScorer
+
+
+def run(model_type: str = BERT_MODEL_TYPE, num_layers: int = None, n_pairs: int = 50):
+    rng = random.Random(0)
+    references = [" ".join(rng.choice(WORDS) for _ in range(rng.randint(20, 80))) for _ in range(max(1, n_pairs // 5))]
+    # Every reference is scored against five candidates, like the five iterations of a rank
+    pairs = [(" ".join(rng.choice(WORDS) for _ in range(rng.randint(20, 80))), ref)
+             for ref in references for _ in range(5)]
+    candidates, refs = zip(*pairs)
+
+    start = time.perf_counter()
+    expected = [bert_scorer([c], [r], model_type=model_type, num_layers=num_layers, device="cpu")
+                for c, r in pairs]
+    per_call = time.perf_counter() - start
+
+    start = time.perf_counter()
+    scorer = BertScorer(model_type, num_layers, device="cpu")
+    load = time.perf_counter() - start
+    start = time.perf_counter()
+    results = scorer.score(list(candidates), list(refs))
+    batched = time.perf_counter() - start
+
+    for (P, R, F), got in zip(expected, results):
+        assert max(abs(a - b) for a, b in zip((P.item(), R.item(), F.item()), got)) < 1e-5
+    print(f"bert_score.score per pair: {len(pairs) / per_call:8.1f} pairs/s")
+    print(f"BertScorer batched:        {len(pairs) / batched:8.1f} pairs/s (model load {load:.1f} s, once)")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    run(args[0] if args else BERT_MODEL_TYPE,
+        int(args[1]) if len(args) > 1 else None,
+        int(args[2]) if len(args) > 2 else 50)
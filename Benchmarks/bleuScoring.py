@@ -0,0 +1,50 @@
+"""
+Checks BleuScorer against NLTK's sentence_bleu/corpus_bleu and times
+scoring five candidates per reference, as run_automated_improvement does.
+Run from the project root: python -m Benchmarks.bleuScoring [n_references]
+"""
+import random
+import sys
+import time
+from nltk.translate.bleu_score import SmoothingFunction, corpus_bleu, sentence_bleu
+from Benchmarks.syntheticRtf import WORDS
+from Scores.bleu import BleuScorer, tokenize
+
+
+def nltk_bleu(generated_report, optimal_report):
+    """calculate_bleu as it was before BleuScorer."""
+    references = [tokenize(optimal_report)] if isinstance(optimal_report, str) else [tokenize(r) for r in optimal_report]
+    return sentence_bleu(references, tokenize(generated_report), smoothing_function=SmoothingFunction().method1)
+
+
+def run(n_references: int = 200):
+    rng = random.Random(0)
+    text = lambda lo, hi: " ".join(rng.choice(WORDS) for _ in range(rng.randint(lo, hi)))
+    references = [text(0, 120) for _ in range(n_references)] + [[text(5, 60), text(5, 60)], "", "a b"]
+    pairs = [(text(0, 120), ref) for ref in references for _ in range(5)] + [("", "a b c"), ("a", "a b c")]
+
+    scorer = BleuScorer()
+    for candidate, reference in pairs:
+        assert scorer.score(candidate, reference) == nltk_bleu(candidate, reference), (candidate, reference)
+    candidates, refs = zip(*pairs)
+    expected = corpus_bleu([[tokenize(r)] if isinstance(r, str) else [tokenize(x) for x in r] for r in refs],
+                           [tokenize(c) for c in candidates], smoothing_function=SmoothingFunction().method1)
+    assert scorer.corpus_score(list(candidates), list(refs)) == expected
+    print(f"{len(pairs)} sentence scores and the corpus score are identical to NLTK")
+
+    start = time.perf_counter()
+    for candidate, reference in pairs:
+        nltk_bleu(candidate, reference)
+    nltk_time = time.perf_counter() - start
+
+    scorer = BleuScorer()
+    start = time.perf_counter()
+    for i in range(0, len(pairs) - 2, 5):
+        scorer.score_many([c for c, _ in pairs[i:i + 5]], pairs[i][1])
+    cached_time = time.perf_counter() - start
+    print(f"NLTK sentence_bleu: {len(pairs) / nltk_time:10.0f} pairs/s")
+    print(f"BleuScorer:         {len(pairs) / cached_time:10.0f} pairs/s")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
@@ -0,0 +1,112 @@
+"""
+Exercises GeminiClient against a local fake generateContent server: requests
+must be stateless, rate limits (429 + Retry-After) are retried, token usage
+is counted and a call never outlasts call_timeout. Then compares one
+request slot with four.
+Run from the project root: python -m Benchmarks.geminiClient [n_calls] [latency]
+"""
+import json
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from LLMs.geminiClient import GeminiClient, GeminiError
+
+
+class FakeGemini(BaseHTTPRequestHandler):
+    latency = 0.0
+    rate_limit_every = 0
+    requests = []
+    lock = threading.Lock()
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        with self.lock:
+            self.requests.append(body)
+            n = len(self.requests)
+        if self.rate_limit_every and n % self.rate_limit_every == 0:
+            self._reply(429, {"error": {"message": "Resource exhausted"}}, {"Retry-After": "0.05"})
+            return
+        if "/models/bad:" in self.path:
+            self._reply(400, {"error": {"message": "Invalid argument"}})
+            return
+        time.sleep(self.latency)
+        prompt = body["contents"][0]["parts"][0]["text"]
+        self._reply(200, {
+            "candidates": [{"content": {"role": "model", "parts": [{"text": f" ocena za: {prompt} "}]}}],
+            "usageMetadata": {"promptTokenCount": len(prompt.split()), "candidatesTokenCount": 3, "totalTokenCount": len(prompt.split()) + 5},
+        })
+
+    def _reply(self, code, payload, headers=None):
+        data = json.dumps(payload).encode('utf-8')
+        try:
+            self.send_response(code)
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        except (BrokenPipeError, ConnectionResetError):
+            # The client gave up on this request (see the call_timeout check)
+            pass
+
+    def log_message(self, format, *args):
+        pass
+
+
+def run(n_calls: int = 40, latency: float = 0.1):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeGemini)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}/v1beta"
+    config = {"max_output_tokens": 9000, "temperature": 0.1}
+
+    FakeGemini.rate_limit_every = 3
+    client = GeminiClient("model", "key", config, max_workers=4, base_url=base_url, backoff=0.01)
+    with ThreadPoolExecutor(4) as pool:
+        results = list(pool.map(client.generate, [f"kritika {i}" for i in range(12)]))
+    assert [r.text for r in results] == [f"ocena za: kritika {i}" for i in range(12)]
+    assert all(len(body["contents"]) == 1 for body in FakeGemini.requests), "requests must not carry history"
+    assert FakeGemini.requests[0]["generationConfig"] == {"maxOutputTokens": 9000, "temperature": 0.1}
+    usage = client.usage()
+    assert usage["calls"] == 12 and usage["retries"] > 0 and usage["prompt_tokens"] == 24 and usage["output_tokens"] == 60
+    try:
+        GeminiClient("bad", "key", config, base_url=base_url).generate("x")
+        raise AssertionError("a 400 must not be retried")
+    except GeminiError as e:
+        assert e.status == 400
+    print(f"stateless requests, {usage['retries']} rate-limit retries and token usage check out")
+
+    # A call gives up after call_timeout, however slow its attempts, and frees its slot
+    FakeGemini.rate_limit_every = 0
+    FakeGemini.latency = 1.0
+    client = GeminiClient("model", "key", config, max_workers=1, base_url=base_url, call_timeout=0.3)
+    start = time.perf_counter()
+    try:
+        client.generate("x")
+        raise AssertionError("a call must not outlast call_timeout")
+    except GeminiError:
+        elapsed = time.perf_counter() - start
+    assert elapsed < 0.6, elapsed
+    FakeGemini.latency = 0.0
+    assert client.generate("y").text == "ocena za: y"
+    print(f"call_timeout: a slow call gave up after {elapsed:.2f} s and released its slot")
+
+    FakeGemini.rate_limit_every = 0
+    FakeGemini.latency = latency
+    for workers in (1, 4):
+        client = GeminiClient("model", "key", config, max_workers=workers, base_url=base_url)
+        start = time.perf_counter()
+        # More threads than slots, as with the critic pool; the client limits them to max_workers
+        with ThreadPoolExecutor(8) as pool:
+            list(pool.map(client.generate, [f"kritika {i}" for i in range(n_calls)]))
+        elapsed = time.perf_counter() - start
+        print(f"{workers} worker(s): {n_calls / elapsed:6.1f} calls/s, {client.usage()['mean_latency'] * 1000:6.1f} ms per call")
+        client.close()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    run(int(args[0]) if args else 40, float(args[1]) if len(args) > 1 else 0.1)
@@ -0,0 +1,72 @@
+"""
+Regression check and timing of the fast HTML cleaning in Data.htmlClean
+against the BeautifulSoup path it replaces.
+Run from the project root: python -m Benchmarks.htmlCleaning [n_blobs]
+"""
+import random
+import sys
+import time
+from Data import htmlClean
+
+PARAGRAPHS = [
+    "<p><strong>Nesreča</strong></p>",
+    "<p><strong>Zastoj</strong> Na štajerski avtocesti je zastoj proti Mariboru.</p>",
+    "<p><strong>Dela na cesti med priključki Vransko in Trojane</strong> do konca meseca</p>",
+    "<p>Na primorski avtocesti je zaprt vozni pas pred predorom Kastelec proti Kopru</p>",
+    "<p>Več na <a href=\"https://www.promet.si\">promet.si</a></p>",
+    "<p>obvoz je po regionalni cesti&nbsp;Vrhnika &amp; Logatec</p>",
+    "<p class=\"info\" style='x'>Burja, <em>1. stopnja</em>,<br>prepoved za hladilnike</p>",
+    "<P><STRONG><em>Opozorilo</em></STRONG> Voznik v napačno smer!</P>",
+    "<p>   </p>",
+    "<p><strong> </strong>presledek</p>",
+    "<p></p>",
+    "<div><p>V <span>predoru</span> Karavanke <b>izmenično</b> enosmerno</p></div>",
+    "<p>&lt;brez oznak&gt; &quot;citat&quot;</p>",
+]
+
+# Constructs the fast path does not handle, they must fall back to BeautifulSoup
+UNUSUAL = [
+    "<p>komentar <!-- skrit --> tekst</p>",
+    "<p>neznana entiteta &euro; in &#269;</p>",
+    "<p>gnezden <p>odstavek</p></p>",
+    "<p>nezaprt <strong>odstavek</p>",
+    "<p>a < b in AT&T</p>",
+    "<script>var p = '<p>x</p>';</script><p>po skripti</p>",
+    "<p>konec</p></div>",
+]
+
+
+def corpus(n_blobs: int, seed: int = 0):
+    rng = random.Random(seed)
+    unique = ["".join(rng.choice(PARAGRAPHS) for _ in range(rng.randint(1, 8))) for _ in range(n_blobs // 10 + 1)]
+    unique += [rng.choice(PARAGRAPHS) + u + rng.choice(PARAGRAPHS) for u in UNUSUAL]
+    # Bulletins repeat for many minutes in the workbook
+    return [rng.choice(unique) for _ in range(n_blobs)], unique
+
+
+def run(n_blobs: int = 20000):
+    blobs, unique = corpus(n_blobs)
+    for skip_links in (False, True):
+        for html in unique:
+            expected = htmlClean._paragraphs_soup(html, skip_links)
+            assert htmlClean.extract_paragraphs(html, skip_links) == expected, (html, skip_links)
+            expected = htmlClean.format_lines(expected)
+            assert htmlClean.html_to_report(html, skip_links) == expected, (html, skip_links)
+    print(f"{len(unique)} distinct blobs give identical output to BeautifulSoup")
+
+    start = time.perf_counter()
+    slow = [htmlClean.format_lines(htmlClean._paragraphs_soup(html, False)) for html in blobs]
+    soup_time = time.perf_counter() - start
+
+    htmlClean.html_to_report.cache_clear()
+    start = time.perf_counter()
+    fast = [htmlClean.html_to_report(html) for html in blobs]
+    fast_time = time.perf_counter() - start
+
+    assert fast == slow
+    print(f"BeautifulSoup: {n_blobs / soup_time:10.0f} blobs/s")
+    print(f"fast + dedup:  {n_blobs / fast_time:10.0f} blobs/s ({soup_time / fast_time:.1f}x)")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
@@ -0,0 +1,65 @@
+"""
+Compares select_medoid with the nested Levenshtein loop get_final_traffic_text
+used before, on windows of near-identical bulletins.
+Run from the project root: python -m Benchmarks.medoidSelection [window_size]
+"""
+import random
+import sys
+import time
+import Levenshtein
+from Benchmarks.htmlCleaning import PARAGRAPHS
+from Data.similarity import select_medoid
+
+
+def loop_medoid(combined_values, threshold=0.8):
+    """The selection get_final_traffic_text used before select_medoid."""
+    similarity_matrix = []
+    for i in range(len(combined_values)):
+        row_similarities = []
+        for j in range(len(combined_values)):
+            similarity = Levenshtein.ratio(combined_values[i], combined_values[j])
+            row_similarities.append(similarity)
+        similarity_matrix.append(row_similarities)
+
+    all_above_threshold = all(
+        similarity >= threshold for row in similarity_matrix for similarity in row if row != similarity_matrix[0]
+    )
+    if all_above_threshold:
+        similarity_sums = [sum(row) for row in similarity_matrix]
+        return similarity_sums.index(max(similarity_sums))
+    return len(combined_values) - 1
+
+
+def window(size: int, rng: random.Random):
+    """A bulletin that is re-sent with small edits, as in a busy 5-minute window."""
+    base = [rng.choice(PARAGRAPHS) for _ in range(6)]
+    values = []
+    for _ in range(size):
+        if values and rng.random() < 0.5:
+            values.append(rng.choice(values))
+        else:
+            edited = list(base)
+            edited[rng.randrange(len(edited))] = rng.choice(PARAGRAPHS)
+            values.append("".join(edited))
+    return values
+
+
+def run(size: int = 60):
+    rng = random.Random(0)
+    windows = [window(rng.randint(1, 20), rng) for _ in range(300)]
+    for values in windows:
+        for threshold in (0.5, 0.8, 0.95, 1.0, 1.5):
+            assert select_medoid(values, threshold) == loop_medoid(values, threshold), (values, threshold)
+    print(f"{len(windows)} windows x 5 thresholds select the same index as the loop")
+
+    values = window(size, rng)
+    for name, fn in (("nested loop", loop_medoid), ("select_medoid", select_medoid)):
+        start = time.perf_counter()
+        for _ in range(10):
+            fn(values, 0.5)
+        elapsed = (time.perf_counter() - start) / 10
+        print(f"{name:>13}: {elapsed * 1000:8.2f} ms per window of {size}")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 60)
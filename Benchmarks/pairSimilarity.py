@@ -0,0 +1,51 @@
+"""
+Checks pair_similarities against the diagonal of the full G * R.T product
+for every PairScorer option, and times the row-wise kernel from 10k to 1M
+report pairs (the diagonal only where the n x n product still fits).
+Run from the project root: python -m Benchmarks.pairSimilarity [max_pairs]
+"""
+import random
+import sys
+import time
+import numpy as np
+from Benchmarks.syntheticRtf import WORDS
+from Data.similarity import PairScorer, pair_similarities
+
+
+def run(max_pairs: int = 1_000_000):
+    rng = random.Random(0)
+    text = lambda lo, hi: " ".join(rng.choice(WORDS) for _ in range(rng.randint(lo, hi)))
+    generated = [text(0, 180) for _ in range(2000)] + ["", "in"]
+    real = [text(0, 120) for _ in range(2000)] + ["zastoj", ""]
+
+    for tfidf in (False, True):
+        for cosine in (True, False):
+            scorer = PairScorer(tfidf=tfidf, cosine=cosine, fit_texts=real)
+            generated_vectors, real_vectors = scorer.transform(generated), scorer.transform(real)
+            expected = (generated_vectors * real_vectors.T).diagonal()
+            np.testing.assert_allclose(pair_similarities(generated_vectors, real_vectors), expected,
+                                       rtol=1e-12, atol=1e-12)
+            print(f"tfidf={tfidf!s:<5} cosine={cosine!s:<5} {len(generated)} pairs match the diagonal")
+
+    # Pairs are drawn from a pool of vectorized reports, so only the kernel is timed
+    scorer = PairScorer()
+    generated_pool, real_pool = scorer.transform(generated), scorer.transform(real)
+    n_pairs = 10_000
+    while n_pairs <= max_pairs:
+        generated_vectors = generated_pool[np.array([rng.randrange(len(generated)) for _ in range(n_pairs)])]
+        real_vectors = real_pool[np.array([rng.randrange(len(real)) for _ in range(n_pairs)])]
+
+        start = time.perf_counter()
+        pair_similarities(generated_vectors, real_vectors)
+        row_time = time.perf_counter() - start
+        line = f"{n_pairs:>9} pairs: row-wise {row_time:7.3f} s"
+        if n_pairs <= 10_000:
+            start = time.perf_counter()
+            (generated_vectors * real_vectors.T).diagonal()
+            line += f", diagonal of G * R.T {time.perf_counter() - start:7.3f} s"
+        print(line)
+        n_pairs *= 10
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
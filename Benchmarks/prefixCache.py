@@ -0,0 +1,95 @@
+"""
+Time to first token of the stateless chat functions with and without the
+prefix KV cache, for prompts that share a long instruction block (as all
+ranks do at iteration 1), one at a time and as one batch. Greedy replies of
+both paths are compared first. GAMS_MODEL_ID / GEMMA_MODEL_ID select a
+smaller checkpoint for a CPU run.
+Run from the project root:
+    python -m Benchmarks.prefixCache [gams|gemma] [n_prompts] [instruction_words] [new_tokens]
+"""
+import importlib
+import random
+import statistics
+import sys
+import time
+import torch
+from transformers import DynamicCache
+from Benchmarks.syntheticRtf import WORDS
+from LLMs.batching import build_conversations, generate_chats
+from LLMs.prefixCache import PrefixCache, supports_prefix_cache
+
+
+def check_eviction():
+    """The least recently used entries go first once max_bytes is exceeded."""
+    def entry(tokens):
+        kv = DynamicCache()
+        kv.update(torch.zeros(1, 1, tokens, 8), torch.zeros(1, 1, tokens, 8), 0)
+        return kv
+
+    cache = PrefixCache(max_bytes=3 * 2 * 8 * 4 * 10)
+    for key in "abc":
+        cache.put(key, entry(10))
+    cache.get("a")
+    cache.put("d", entry(10))
+    assert cache.get("b") is None and all(cache.get(k) is not None for k in "acd")
+    cache.put("e", entry(40))
+    assert cache.stats()["entries"] == 3 and cache.get("e") is None
+    print("PrefixCache: LRU eviction by size ok")
+
+
+def ttft(call, repeats: int = 3) -> float:
+    """Median seconds of call(), which generates a single token."""
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        call()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def run(model_name: str = "gams", n_prompts: int = 10, instruction_words: int = 600, new_tokens: int = 32):
+    check_eviction()
+
+    module = importlib.import_module("LLMs.gaMS" if model_name == "gams" else "LLMs.gemma")
+    pipe = module.pipe
+    rng = random.Random(0)
+    instructions = " ".join(rng.choice(WORDS) for _ in range(instruction_words))
+    prompts = [" ".join(rng.choice(WORDS) for _ in range(rng.randint(20, 120))) for _ in range(n_prompts)]
+    conversations = build_conversations(prompts, instructions)
+    prefix_tokens = len(pipe.tokenizer(instructions, add_special_tokens=False)["input_ids"])
+    print(f"instructions: {len(instructions)} characters, {prefix_tokens} tokens")
+    if not supports_prefix_cache(pipe.model):
+        print(f"{type(pipe.model).__name__} generates with a "
+              f"'{pipe.model.generation_config.cache_implementation}' cache: the cached path falls back to the pipeline")
+
+    settings = dict(max_new_tokens=new_tokens, do_sample=False, temperature=None,
+                    eos_token_id=module.eos_token_id, pad_token_id=pipe.tokenizer.pad_token_id)
+    cache = PrefixCache()
+    plain = generate_chats(pipe, conversations, n_prompts, **settings)
+    cached = generate_chats(pipe, conversations, n_prompts, prefix_cache=cache, prefix=instructions, **settings)
+    single = [generate_chats(pipe, [c], 1, prefix_cache=cache, prefix=instructions, **settings)[0]
+              for c in conversations]
+    print(f"greedy replies identical to the pipeline: batched {sum(a == b for a, b in zip(plain, cached))}"
+          f"/{n_prompts}, one at a time {sum(a == b for a, b in zip(plain, single))}/{n_prompts}")
+
+    first = dict(settings, max_new_tokens=1)
+    one = conversations[:1]
+    plain_one = ttft(lambda: generate_chats(pipe, one, 1, **first))
+    cached_one = ttft(lambda: generate_chats(pipe, one, 1, prefix_cache=cache, prefix=instructions, **first))
+    plain_batch = ttft(lambda: generate_chats(pipe, conversations, n_prompts, **first))
+    cached_batch = ttft(lambda: generate_chats(pipe, conversations, n_prompts, prefix_cache=cache,
+                                               prefix=instructions, **first))
+
+    print(f"time to first token     no cache   cache")
+    print(f"one prompt             {plain_one * 1000:7.1f} ms {cached_one * 1000:7.1f} ms "
+          f"({plain_one / cached_one:.1f}x)")
+    print(f"batch of {n_prompts:<3}           {plain_batch * 1000:7.1f} ms {cached_batch * 1000:7.1f} ms "
+          f"({plain_batch / cached_batch:.1f}x)")
+    stats = cache.stats()
+    print(f"cache: {stats['entries']} entries, {stats['bytes'] / 2 ** 20:.1f} MiB, "
+          f"{stats['hits']} hits, {stats['misses']} misses")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    run(args[0] if args else "gams", *(int(a) for a in args[1:4]))
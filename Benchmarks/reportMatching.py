@@ -0,0 +1,77 @@
+"""
+Regression check and timing of match_reports and the streaming
+iter_matched_pairs against the original nested generated x real loop of
+analyze_reports.
+Run from the project root: python -m Benchmarks.reportMatching [days]
+"""
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+import pandas as pd
+from Data.readData import iter_matched_pairs, match_reports
+
+
+def loop_matches(generated_stamps, real_stamps):
+    """The matching loop analyze_reports used before match_reports."""
+    result = []
+    for gen_ts in generated_stamps:
+        idx = -1
+        for i, real_ts in enumerate(real_stamps):
+            if gen_ts <= real_ts <= gen_ts + timedelta(minutes=15):
+                idx = i
+                break
+        result.append(idx)
+    return result
+
+
+def synthetic_stamps(days: int, seed: int = 0):
+    rng = random.Random(seed)
+    start = datetime(2023, 1, 1)
+    generated = list(pd.date_range(start, start + timedelta(days=days), freq="min"))
+    real = sorted({start + timedelta(minutes=rng.randint(0, days * 24 * 60)) for _ in range(days * 40)})
+    return generated, real
+
+
+def run(days: int = 365):
+    # Regression on sampled data, for a chronological and a shuffled real cache
+    generated, real = synthetic_stamps(7)
+    sample = random.Random(1).sample(generated, 2000)
+    shuffled = random.Random(2).sample(real, len(real))
+    for name, real_stamps in (("chronological", real), ("shuffled", shuffled)):
+        expected = loop_matches(sample, real_stamps)
+        assert list(match_reports(sample, real_stamps)) == expected, f"Mismatch on {name} real cache"
+        print(f"{name:>22}: {sum(i >= 0 for i in expected)} / {len(sample)} matches identical to the loop")
+
+    # The streaming matcher needs the generated side in time order; the real
+    # side keeps cache order, and a repeated stamp its first position and last body
+    ordered = sorted(sample)
+    for name, real_stamps in (("chronological", real), ("shuffled", shuffled)):
+        expected = loop_matches(ordered, real_stamps)
+        cache = dict((ts, i) for i, ts in enumerate(real_stamps))
+        repeated = [(ts, -i) for i, ts in enumerate(real_stamps[::7])]
+        cache.update(repeated)
+        expected_pairs = [(ts, cache[real_stamps[i]]) for ts, i in zip(ordered, expected) if i >= 0]
+        streamed = iter_matched_pairs(((ts, i) for i, ts in enumerate(ordered)),
+                                      [(ts, i) for i, ts in enumerate(real_stamps)] + repeated, chunk_size=100)
+        assert [(ordered[g], r) for _, g, r in streamed] == expected_pairs, f"Mismatch on streamed {name} cache"
+        print(f"{'streamed ' + name:>22}: pairs identical to the loop")
+
+    generated, real = synthetic_stamps(days)
+    start = time.perf_counter()
+    matches = match_reports(generated, real)
+    elapsed = time.perf_counter() - start
+    print(f"{days} days: {len(generated)} generated x {len(real)} real matched in {elapsed:.2f} s "
+          f"({(matches >= 0).sum()} matches)")
+
+    start = time.perf_counter()
+    streamed = iter_matched_pairs(((ts, None) for ts in generated), ((ts, None) for ts in real))
+    next(streamed)
+    first = time.perf_counter() - start
+    count = 1 + sum(1 for _ in streamed)
+    print(f"{days} days streamed: first pair after {first * 1000:.2f} ms, "
+          f"{count} pairs in {time.perf_counter() - start:.2f} s")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 365)
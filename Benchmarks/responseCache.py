@@ -0,0 +1,132 @@
+"""
+Offline check of the Gemini response cache with a stub backend in place of
+the API: hits and misses, bypass, key separation by model / config / prompt,
+uncached errors, LRU eviction by size, concurrent callers and persistence
+across reopening. Then times replayed critiques against the stub's latency.
+Run from the project root: python -m Benchmarks.responseCache [n_prompts] [latency]
+"""
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from LLMs.responseCache import ResponseCache, cached_generate, make_key
+
+MODEL = "gemini-stub"
+CONFIG = {"max_output_tokens": 100, "temperature": 0.1}
+
+
+class StubBackend:
+    """Answers every prompt with a numbered critique after latency seconds, and counts the calls."""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def __call__(self, prompt: str) -> str:
+        time.sleep(self.latency)
+        with self._lock:
+            self.calls.append(prompt)
+            return f"ocena {len(self.calls)}: {prompt}"
+
+
+def check(tmp: Path):
+    path = tmp / "responses.sqlite"
+    cache = ResponseCache(path)
+    backend = StubBackend()
+
+    first = cached_generate(cache, backend, MODEL, CONFIG, "prompt a")
+    assert cached_generate(cache, backend, MODEL, CONFIG, "prompt a") == first and len(backend.calls) == 1
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+    print("hit / miss: a repeated prompt is replayed without calling the backend")
+
+    fresh = cached_generate(cache, backend, MODEL, CONFIG, "prompt a", bypass=True)
+    assert fresh != first and len(backend.calls) == 2
+    assert cached_generate(cache, backend, MODEL, CONFIG, "prompt a") == fresh
+    print("bypass: the backend is called and its response replaces the stored one")
+
+    cached_generate(cache, backend, "other-model", CONFIG, "prompt a")
+    cached_generate(cache, backend, MODEL, dict(CONFIG, temperature=0.7), "prompt a")
+    cached_generate(cache, backend, MODEL, CONFIG, "prompt b")
+    assert len(backend.calls) == 5
+    assert make_key(MODEL, CONFIG, "p") == make_key(MODEL, dict(reversed(list(CONFIG.items()))), "p")
+    print("keys: model, generation config and prompt are all part of the key")
+
+    def failing(prompt):
+        raise RuntimeError("503")
+
+    try:
+        cached_generate(cache, failing, MODEL, CONFIG, "prompt c")
+    except RuntimeError:
+        pass
+    assert cache.get(make_key(MODEL, CONFIG, "prompt c")) is None
+    print("errors: a failed call stores nothing")
+    cache.close()
+
+    # Room for three responses of 100 bytes; "x1" is used again, so "x2" is the oldest
+    small = ResponseCache(tmp / "small.sqlite", max_bytes=300)
+    for i in range(3):
+        small.put(f"x{i}", "r" * 100)
+        time.sleep(0.01)
+    small.get("x0")
+    time.sleep(0.01)
+    small.get("x1")
+    time.sleep(0.01)
+    small.put("x3", "r" * 100)
+    assert small.get("x2") is None and all(small.get(f"x{i}") for i in (0, 1, 3))
+    assert small.stats()["bytes"] <= 300
+    small.close()
+    print("eviction: least recently used responses go first once max_bytes is exceeded")
+
+    cache = ResponseCache(path)
+    backend = StubBackend(latency=0.01)
+    results = {}
+
+    def caller(i):
+        results[i] = cached_generate(cache, backend, MODEL, CONFIG, f"thread prompt {i % 5}")
+
+    # Concurrent misses all call the backend; the second round is served from the cache
+    for _ in range(2):
+        calls = len(backend.calls)
+        threads = [threading.Thread(target=caller, args=(i,)) for i in range(40)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        for i in range(40):
+            assert results[i].endswith(f"thread prompt {i % 5}")
+    assert len(backend.calls) == calls
+    print("threads: 40 callers on 5 prompts got their own prompt's response, then all replayed")
+    cache.close()
+
+    reopened = ResponseCache(path)
+    backend = StubBackend()
+    assert cached_generate(reopened, backend, MODEL, CONFIG, "prompt a") == fresh and not backend.calls
+    reopened.close()
+    print("persistence: responses survive reopening the cache file")
+
+
+def run(n_prompts: int = 20, latency: float = 0.2):
+    with tempfile.TemporaryDirectory() as tmp:
+        check(Path(tmp))
+
+        cache = ResponseCache(Path(tmp) / "timing.sqlite")
+        backend = StubBackend(latency)
+        prompts = [f"critique {i}" for i in range(n_prompts)]
+        start = time.perf_counter()
+        for prompt in prompts:
+            cached_generate(cache, backend, MODEL, CONFIG, prompt)
+        cold = time.perf_counter() - start
+        start = time.perf_counter()
+        for prompt in prompts:
+            cached_generate(cache, backend, MODEL, CONFIG, prompt)
+        warm = time.perf_counter() - start
+        cache.close()
+    print(f"{n_prompts} critiques at {latency:.2f} s each: {cold:.2f} s from the backend, "
+          f"{warm * 1000:.1f} ms replayed")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    run(int(args[0]) if args else 20, float(args[1]) if len(args) > 1 else 0.2)
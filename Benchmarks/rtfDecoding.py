@@ -0,0 +1,71 @@
+"""
+Checks fast_rtf_to_text against striprtf's rtf_to_text on a synthetic
+bulletin corpus and on RTF constructs the bulletins may contain, and
+compares their throughput.
+Run from the project root: python -m Benchmarks.rtfDecoding [n_files]
+"""
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+from striprtf.striprtf import rtf_to_text
+from Benchmarks.syntheticRtf import make_corpus
+from Data.rtfParse import decode_rtf, fast_rtf_to_text
+
+HEADER = "{\\rtf1\\ansi\\ansicpg1250\\deff0{\\fonttbl{\\f0\\fswiss\\fcharset238 Arial;}{\\f1\\fnil\\fcharset0 Courier;}}\n"
+
+# Constructs beyond the plain bulletin layout
+SNIPPETS = [
+    "\\'e8\\'9a\\'9e rob\\'e8ki",                           # cp1250 bytes
+    "{\\f1 \\'e8 in \\'e9}",                                # bytes in another font's code page
+    "\\u269?esta \\uc2\\u382??x \\uc0\\u-3913 y",           # unicode escapes and skips
+    "\\u268\\'3f ostalo",                                   # skipped \\'hh after \\u
+    "tab\\tab line\\line nbsp\\~hyphen\\-end\\_",
+    "\\{oklepaji\\} in \\\\ posevnica",
+    "{\\*\\generator Msftedit 5.41;}{\\colortbl ;\\red0\\green0\\blue0;}",
+    "{\\info{\\title Naslov}{\\author Avtor}}",
+    "\\b krepko\\b0  \\i le\\'9ee\\'e8e\\i0 ",
+    "\\emdash\\endash\\bullet\\lquote x\\rquote\\ldblquote y\\rdblquote",
+    "prelom\r\nvrstice sredi\nbesedila",
+    "\\cell a\\cell\\row\\sect\\page",
+    "\\unknownword123 besedilo \\x42 \\1 znak",
+    "\\abcdefghijklmnopqrstuvwxyzabcdefghijkl dolga beseda",
+]
+
+
+def variants(rng: random.Random, n: int):
+    for i in range(n):
+        body = "\\par\n".join(rng.sample(SNIPPETS, rng.randint(1, 5)))
+        yield (HEADER + "\\viewkind4\\uc1\\pard\\f0\\fs20 "
+               f"{rng.randint(1, 28)}. {rng.randint(1, 12)}. 2023 \t {rng.randint(0, 23)}.{rng.randint(0, 59):02d}"
+               f"\\par\nPodatki o prometu.\\par\n{body}\\par\n}}" + ("po dokumentu" if i % 5 == 0 else ""))
+
+
+def run(n_files: int = 3000):
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        dir_path = make_corpus(Path(tmp), n_files)
+        corpus = [f.read_text(encoding="utf-8") for f in sorted(dir_path.glob("*.rtf"))]
+
+    tests = corpus + list(variants(rng, 500)) + ["{\\rtf1 a}}} b", "{\\rtf1 x\\", "}{\\rtf1 z}"]
+    for text in tests:
+        assert fast_rtf_to_text(text) == rtf_to_text(text), text
+    fallback = ["{\\rtf1{\\pict\\bin3 abc}tekst}",
+                '{\\rtf1{\\field{\\*\\fldinst{HYPERLINK "https://www.promet.si"}}{\\fldrslt{promet.si}}}}']
+    for text in fallback:
+        assert fast_rtf_to_text(text) is None and decode_rtf(text) == rtf_to_text(text)
+    print(f"{len(tests)} documents identical to rtf_to_text, {len(fallback)} left to it")
+
+    timings = {}
+    for name, decode in (("rtf_to_text", rtf_to_text), ("fast_rtf_to_text", fast_rtf_to_text)):
+        start = time.perf_counter()
+        for text in corpus:
+            decode(text)
+        timings[name] = time.perf_counter() - start
+        print(f"{name:>16}: {len(corpus) / timings[name]:10.0f} files/s")
+    print(f"Speed-up: {timings['rtf_to_text'] / timings['fast_rtf_to_text']:.1f}x")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 3000)
@@ -0,0 +1,42 @@
+"""
+Compares files/second of RTF ingestion at different worker counts.
+Run from the project root: python -m Benchmarks.rtfIngestion [n_files]
+"""
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from Benchmarks.syntheticRtf import make_corpus
+from Data import rtfIndex
+
+
+def run(n_files: int = 2000):
+    with tempfile.TemporaryDirectory() as tmp:
+        dir_path = make_corpus(Path(tmp) / "rtf", n_files)
+        rtfIndex.index_dir = Path(tmp) / "index"
+
+        baseline = None
+        for workers in (1, 2, 4, os.cpu_count()):
+            rtfIndex._loaded.clear()
+            for f in rtfIndex.index_dir.glob("*.pkl"):
+                f.unlink()
+
+            executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+            start = time.perf_counter()
+            index = rtfIndex.load_month_index(dir_path, executor)
+            elapsed = time.perf_counter() - start
+            if executor is not None:
+                executor.shutdown()
+
+            files = {name: (sig_mtime, size, stamps.tolist(), body)
+                     for name, (sig_mtime, size, stamps, body) in index["files"].items()}
+            if baseline is None:
+                baseline = files
+            assert files == baseline, f"Output with {workers} workers differs from serial"
+            print(f"workers={workers:>3}: {n_files / elapsed:10.1f} files/s ({elapsed:.2f} s)")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
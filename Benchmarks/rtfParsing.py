@@ -0,0 +1,102 @@
+"""
+Checks Data.rtfParse against the per-match datetime parsing rtfIndex used
+before, on a synthetic RTF corpus (with extra and invalid stamps), also
+from a thread pool, and times the parsing of the decoded texts and the
+index lookups built from the datetime lists and from the int64 stamps.
+Run from the project root: python -m Benchmarks.rtfParsing [n_files]
+"""
+import random
+import re
+import sys
+import tempfile
+import time
+from bisect import bisect_left, bisect_right
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+import numpy as np
+from striprtf.striprtf import rtf_to_text
+from Benchmarks.syntheticRtf import make_corpus
+from Data import rtfIndex
+from Data.rtfParse import MARKER, parse_rtf_text
+
+stamp_rx = re.compile(r"(\d{1,2})\.\s*(\d{1,2})\.\s*(\d{4})\s+[\t ]+\s*(\d{1,2})\.(\d{2})")
+
+
+def legacy_parse(raw: str):
+    """The text part of parse_rtf_file before Data.rtfParse."""
+    stamps = []
+    for m in stamp_rx.finditer(raw):
+        d, mth, y, h, mi = map(int, m.groups())
+        try:
+            stamps.append(datetime(y, mth, d, h, mi))
+        except ValueError:
+            continue
+
+    body = raw.split(MARKER, 1)[-1].lstrip()
+    body = "\n".join(ln for ln in body.splitlines() if ln.strip())
+    return stamps, body
+
+
+def legacy_find(files: dict, queries):
+    """rtfIndex._build_lookup and find_report over datetime lists, before the int64 stamps."""
+    entries = sorted((stamp, name, pos) for name, (stamps, _) in files.items() for pos, stamp in enumerate(stamps))
+    stamps = [e[0] for e in entries]
+    found = []
+    for t_start, t_end in queries:
+        lo, hi = bisect_left(stamps, t_start), bisect_right(stamps, t_end)
+        if lo >= hi:
+            found.append(None)
+            continue
+        stamp, name, _ = min(entries[lo:hi], key=lambda e: (e[1], e[2]))
+        found.append((name, stamp, files[name][1]))
+    return found
+
+
+def indexed_find(files: dict, queries):
+    index = {"files": {name: (0, 0, stamps, body) for name, (stamps, body) in files.items()}}
+    rtfIndex._build_lookup(index)
+    return [rtfIndex.find_report(index, t_start, t_end) for t_start, t_end in queries]
+
+
+def run(n_files: int = 5000):
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        dir_path = make_corpus(Path(tmp), n_files)
+        texts = [rtf_to_text(f.read_text(encoding="utf-8")) for f in sorted(dir_path.glob("*.rtf"))]
+
+    extra = ["31. 2. 2023  10.00", "1. 13. 2023  9.00", "5. 5. 2023  24.00", "29. 2. 2024 \t 23.59",
+             "12. 6. 2023  7.30", "1. 1. 0000  0.00"]
+    texts = [text + "\n" + " ".join(rng.sample(extra, rng.randint(0, 3))) if i % 3 == 0 else text
+             for i, text in enumerate(texts)]
+
+    expected = [legacy_parse(text) for text in texts]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        threaded = list(pool.map(parse_rtf_text, texts))
+    for (old_stamps, old_body), (stamps, body) in zip(expected, threaded):
+        assert [int(np.datetime64(s, 'ns').view(np.int64)) for s in old_stamps] == stamps.tolist()
+        assert body == old_body
+    print(f"{len(texts)} files: stamps and bodies identical to the previous parsing (from 8 threads)")
+
+    for name, parse in (("per-match datetime", legacy_parse), ("rtfParse", parse_rtf_text)):
+        start = time.perf_counter()
+        for text in texts:
+            parse(text)
+        elapsed = time.perf_counter() - start
+        print(f"{name:>18}: {len(texts) / elapsed:10.0f} files/s ({elapsed:.3f} s)")
+
+    # Lookups as get_real_traffic_report makes them, over one month of files
+    starts = [datetime(2023, 1, 1) + timedelta(minutes=rng.randint(0, 60 * 24 * 60)) for _ in range(10_000)]
+    queries = [(t, t + timedelta(minutes=15)) for t in starts]
+    old_files = {f"promet_{i:05d}.rtf": parsed for i, parsed in enumerate(expected)}
+    new_files = {f"promet_{i:05d}.rtf": parsed for i, parsed in enumerate(threaded)}
+    timings = {}
+    for name, find, files in (("datetime lists", legacy_find, old_files), ("int64 stamps", indexed_find, new_files)):
+        start = time.perf_counter()
+        timings[name] = find(files, queries)
+        print(f"{name:>18}: index + {len(queries)} lookups in {time.perf_counter() - start:.3f} s")
+    assert timings["datetime lists"] == timings["int64 stamps"]
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
@@ -0,0 +1,83 @@
+"""
+Checks the month-sharded preload_generated_reports against generating the
+whole workbook at once, and times a one-month against a full-range run with
+no shards on disk, then the one month again from its shard.
+Run from the project root: python -m Benchmarks.shardedGeneration [rows_per_month]
+"""
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+import pandas as pd
+from Benchmarks.htmlCleaning import PARAGRAPHS
+from Data import excelCache, reportCache
+from Data.htmlClean import html_to_report, join_columns
+from Data.readData import preload_generated_reports
+
+
+def make_workbook(path: Path, rows_per_month: int, seed: int = 0):
+    """Year sheets 2022-2024, rows_per_month rows of HTML cells in every month."""
+    rng = random.Random(seed)
+    html = lambda: "".join(rng.choice(PARAGRAPHS) for _ in range(rng.randint(1, 4)))
+    with pd.ExcelWriter(path) as writer:
+        for year in (2022, 2023, 2024):
+            rows = []
+            for month in range(1, 13):
+                start = datetime(year, month, 1)
+                step = (28 * 24 * 3600) // rows_per_month
+                for i in range(rows_per_month):
+                    stamp = start + timedelta(seconds=i * step + rng.randint(0, step - 1))
+                    rows.append({'Datum': stamp, 'A1': html(), 'B1': html() if i % 4 == 0 else None, 'C1': None})
+            pd.DataFrame(rows).to_excel(writer, sheet_name=str(year), index=False)
+
+
+def whole_workbook_reports(data_file):
+    """preload_generated_reports before the month shards: every row of the workbook at once."""
+    full_df = excelCache.read_traffic_rows(data_file, columns=['Datum', 'A1', 'B1', 'C1'])
+    full_df['Datum'] = full_df['Datum'].dt.floor('T')
+    full_df.dropna(subset=['Datum'], inplace=True)
+    full_df['Combined1'] = join_columns(full_df, ['A1', 'B1', 'C1'])
+    latest = full_df.groupby('Datum', sort=True)['Combined1'].last()
+    report_cache = {}
+    for timestamp, selected_combined in latest.items():
+        final_text = html_to_report(selected_combined)
+        if final_text:
+            report_cache[pd.to_datetime(timestamp)] = final_text
+    return report_cache
+
+
+def timed(data_file, start=None, end=None):
+    started = time.perf_counter()
+    reports = preload_generated_reports(data_file, start, end)
+    return reports, time.perf_counter() - started
+
+
+def run(rows_per_month: int = 2000):
+    with tempfile.TemporaryDirectory() as tmp:
+        data_file = Path(tmp) / "workbook.xlsx"
+        make_workbook(data_file, rows_per_month)
+        excelCache.cache_dir = Path(tmp) / "PrometnoPorocilo"
+        reportCache.store_dir = Path(tmp) / "generated_reports"
+        excelCache.ensure_workbook_cache(data_file)
+
+        month = (datetime(2023, 6, 1), datetime(2023, 6, 30, 23, 59, 59))
+        one_month, month_cold = timed(data_file, *month)
+        shutil.rmtree(reportCache.store_dir)
+        full, full_cold = timed(data_file)
+        again, month_warm = timed(data_file, *month)
+
+        expected = whole_workbook_reports(data_file)
+        assert list(full.items()) == list(expected.items())
+        assert list(one_month.items()) == list(again.items()) == \
+            [(ts, text) for ts, text in expected.items() if month[0] <= ts <= month[1]]
+        print(f"Sharded reports are identical to generating the whole workbook ({len(full)} reports)")
+        print(f"one month, no shards:  {month_cold:6.2f} s ({len(one_month)} reports)")
+        print(f"full range, no shards: {full_cold:6.2f} s ({len(full)} reports)")
+        print(f"one month, from shard: {month_warm:6.2f} s")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
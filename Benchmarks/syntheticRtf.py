@@ -0,0 +1,40 @@
+import random
+from datetime import datetime, timedelta
+from pathlib import Path
+
+WORDS = ("Na štajerski avtocesti je zastoj proti Mariboru med Blagovico in Trojanami "
+         "zaradi nesreče. Zaprt je vozni pas na primorski avtocesti pred predorom "
+         "Kastelec proti Kopru, obvoz je po regionalni cesti.").split()
+
+
+def _escape(text: str) -> str:
+    return "".join(ch if ord(ch) < 128 else f"\\u{ord(ch)}?" for ch in text)
+
+
+def make_rtf(stamp: datetime, lines) -> str:
+    """Builds a bulletin in the rtvslo.si RTF layout: header stamp, MARKER, body."""
+    body = "\\par\n".join(_escape(line) for line in lines)
+    return ("{\\rtf1\\ansi\\ansicpg1250\\deff0{\\fonttbl{\\f0\\fswiss Arial;}}\n"
+            "\\viewkind4\\uc1\\pard\\f0\\fs20 "
+            f"{stamp.day}. {stamp.month}. {stamp.year} \t {stamp.hour}.{stamp.minute:02d}\\par\n\\par\n"
+            f"Podatki o prometu.\\par\n\\par\n{body}\\par\n\\par\n}}")
+
+
+def make_corpus(root: Path, n_files: int = 500, year: int = 2023, month: int = 1, seed: int = 0) -> Path:
+    """
+    Writes n_files synthetic bulletins into root/Promet <year>/<Month> <year>
+    and returns that month directory.
+    """
+    months = ["Januar", "Februar", "Marec", "April", "Maj", "Junij",
+              "Julij", "Avgust", "September", "Oktober", "November", "December"]
+    rng = random.Random(seed)
+    dir_path = Path(root) / f"Promet {year}" / f"{months[month - 1]} {year}"
+    dir_path.mkdir(parents=True, exist_ok=True)
+
+    stamp = datetime(year, month, 1)
+    for i in range(n_files):
+        stamp += timedelta(minutes=rng.randint(5, 40))
+        lines = [" ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 25)))
+                 for _ in range(rng.randint(2, 8))]
+        (dir_path / f"promet_{i:05d}.rtf").write_text(make_rtf(stamp, lines), encoding="utf-8")
+    return dir_path
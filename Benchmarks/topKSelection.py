@@ -0,0 +1,81 @@
+"""
+Checks the streaming top-K selection of analyze_reports(top_k=...) against
+the full sort + drop_duplicates path and compares time and peak memory.
+Run from the project root: python -m Benchmarks.topKSelection [n_pairs] [k]
+"""
+import random
+import resource
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+from Benchmarks.syntheticRtf import WORDS
+from Data.readData import SIMILARITY_CHUNK, _top_matches
+from Data.similarity import PairScorer
+
+
+def full_matches(gen_items, matches, real_reports):
+    """The full path of analyze_reports: every pair in a DataFrame, sorted and deduplicated."""
+    results_df = pd.DataFrame([{
+        'timestamp': gen_ts.strftime("%Y-%m-%d %H:%M:%S"),
+        'generated_report': gen_report,
+        'real_report': real_reports[real_idx]
+    } for (gen_ts, gen_report), real_idx in zip(gen_items, matches) if real_idx >= 0])
+    results_df = results_df[results_df['generated_report'].str.len() < 1000]
+    results_df['hash_similarity'] = PairScorer().score(results_df['generated_report'], results_df['real_report'])
+    results_df = results_df.sort_values(by='hash_similarity', ascending=False, kind='stable')
+    return results_df.drop_duplicates(subset=['real_report'], keep='first')
+
+
+def synthetic_pairs(n_pairs: int, seed: int = 0):
+    """Minute-by-minute generated reports, each matched to one of n_pairs / 20 real reports."""
+    rng = random.Random(seed)
+    text = lambda lo, hi: " ".join(rng.choice(WORDS) for _ in range(rng.randint(lo, hi)))
+    real_reports = [text(10, 120) for _ in range(max(1, n_pairs // 20))]
+    variants = [text(5, 180) for _ in range(500)]
+    start = datetime(2023, 1, 1)
+    gen_items = [(start + timedelta(minutes=i), rng.choice(variants)) for i in range(n_pairs)]
+    matches = np.array([rng.randrange(len(real_reports)) if rng.random() < 0.9 else -1 for _ in range(n_pairs)])
+    return gen_items, matches, real_reports
+
+
+def pairs(gen_items, matches, real_reports):
+    return ((gen_ts, gen_report, real_reports[real_idx])
+            for (gen_ts, gen_report), real_idx in zip(gen_items, matches) if real_idx >= 0)
+
+
+def _timed(name: str, n_pairs: int, k: int):
+    gen_items, matches, real_reports = synthetic_pairs(n_pairs)
+    start = time.perf_counter()
+    if name == "full":
+        full_matches(gen_items, matches, real_reports)
+    else:
+        _top_matches(pairs(gen_items, matches, real_reports), PairScorer(), k, SIMILARITY_CHUNK)
+    return time.perf_counter() - start, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 2 ** 10
+
+
+def measure(name: str, n_pairs: int, k: int):
+    """Time and peak RSS (MiB, including the inputs) of one selection, in a fresh process."""
+    with ProcessPoolExecutor(max_workers=1) as pool:
+        return pool.submit(_timed, name, n_pairs, k).result()
+
+
+def run(n_pairs: int = 200_000, k: int = 100):
+    gen_items, matches, real_reports = synthetic_pairs(3000)
+    expected = full_matches(gen_items, matches, real_reports).reset_index(drop=True)
+    for top_k, chunk_size in ((k, SIMILARITY_CHUNK), (7, 333), (len(expected) + 5, 1000)):
+        top = _top_matches(pairs(gen_items, matches, real_reports), PairScorer(), top_k, chunk_size)
+        pd.testing.assert_frame_equal(top, expected.head(top_k).reset_index(drop=True))
+    print("Top-K rows are identical to head(K) of the full path")
+
+    full_time, full_peak = measure("full", n_pairs, k)
+    top_time, top_peak = measure("top", n_pairs, k)
+    print(f"{n_pairs} pairs, K={k}")
+    print(f"  full sort: {full_time:.2f} s, peak RSS {full_peak:.0f} MiB")
+    print(f"  top-K:     {top_time:.2f} s, peak RSS {top_peak:.0f} MiB")
+
+
+if __name__ == "__main__":
+    run(*(int(a) for a in sys.argv[1:3]))
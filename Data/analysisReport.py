@@ -0,0 +1,88 @@
+"""
+Structured form of the analysis report written by find_good_reports: one
+JSON line per rank with its timestamp, similarity and the generated / real
+report texts. The decorated .txt report is only a human-readable view of the
+same ranks; step_one loads the .jsonl next to it.
+"""
+import json
+import re
+from pathlib import Path
+from typing import Dict
+
+rank_header_rx = re.compile(r"^---------- RANK (\d+) ----------$", re.MULTILINE)
+field_rx = re.compile(r"^(TIMESTAMP|SIMILARITY SCORE):\s*(.*)$", re.MULTILINE)
+
+
+def records_path(text_path) -> Path:
+    return Path(text_path).with_suffix(".jsonl")
+
+
+def save_report_records(path, df):
+    """Writes the rows of an analyze_reports result, in order, as ranks 1..len(df)."""
+    with open(path, 'w', encoding='utf-8') as f:
+        for rank, row in enumerate(df.itertuples(index=False), start=1):
+            record = {
+                "rank": rank,
+                "timestamp": str(row.timestamp),
+                "similarity": float(row.hash_similarity),
+                "generated": row.generated_report.strip(),
+                "real": row.real_report.strip(),
+            }
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def load_report_records(path) -> Dict[int, dict]:
+    """{rank: record} from a .jsonl written by save_report_records."""
+    with open(path, 'r', encoding='utf-8') as f:
+        records = (json.loads(line) for line in f if line.strip())
+        return {record["rank"]: record for record in records}
+
+
+def parse_analysis_text(full_text: str) -> Dict[int, dict]:
+    """
+    {rank: record} from the text report, in one pass over the file. Gives the
+    same texts as the old per-rank regex (the real report is cut at the first
+    '----------'); ranks that cannot be parsed are left out.
+    """
+    parts = rank_header_rx.split(full_text)
+    records = {}
+    for rank_str, body in zip(parts[1::2], parts[2::2]):
+        rank = int(rank_str)
+        generated_marker = f"--- GENERATED REPORT for RANK {rank} (from Excel) ---\n"
+        real_marker = f"--- REAL REPORT for RANK {rank} (from RTF) ---\n"
+        gen_start = body.find(generated_marker)
+        real_start = body.find(real_marker, gen_start + 1)
+        if gen_start < 0 or real_start < 0:
+            continue
+
+        fields = dict(field_rx.findall(body[:gen_start]))
+        generated = body[gen_start + len(generated_marker):real_start].strip()
+        real = body[real_start + len(real_marker):].split('----------')[0].strip()
+        records[rank] = {
+            "rank": rank,
+            "timestamp": fields.get("TIMESTAMP", "").strip(),
+            "similarity": float(fields["SIMILARITY SCORE"]) if "SIMILARITY SCORE" in fields else None,
+            "generated": generated,
+            "real": real,
+        }
+    return records
+
+
+def load_analysis_report(text_path) -> Dict[int, dict]:
+    """
+    The ranks of an analysis report. Reads the .jsonl next to text_path; a
+    report written before the .jsonl existed, or replaced since (the .txt is
+    newer than the .jsonl), is parsed and its .jsonl saved for the next run.
+    """
+    path = records_path(text_path)
+    text_path = Path(text_path)
+    if path.is_file() and not (text_path.is_file() and text_path.stat().st_mtime > path.stat().st_mtime):
+        return load_report_records(path)
+
+    with open(text_path, 'r', encoding='utf-8') as f:
+        records = parse_analysis_text(f.read())
+    with open(path, 'w', encoding='utf-8') as f:
+        for rank in sorted(records):
+            f.write(json.dumps(records[rank], ensure_ascii=False) + "\n")
+    print(f"Saved the ranks of '{text_path}' to '{path}'")
+    return records
@@ -0,0 +1,160 @@
+import hashlib
+import json
+import shutil
+from pathlib import Path
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+# Bump when the conversion below changes so stale caches get rebuilt
+CACHE_VERSION = 1
+
+COLUMNS = ['Datum', 'A1', 'B1', 'C1', 'A2', 'B2', 'C2']
+
+cache_dir = Path("./Data/cache/PrometnoPorocilo")
+
+
+def file_sha256(path) -> str:
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _read_manifest():
+    try:
+        with open(cache_dir / "manifest.json", 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def _write_manifest(target_dir: Path, manifest: dict):
+    with open(target_dir / "manifest.json", 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+
+
+def _convert(data_file, target_dir: Path):
+    """
+    Reads every year sheet of the workbook once and writes it as Parquet files
+    partitioned by year/month, sorted by Datum. The 'row' column keeps each
+    row's position in the workbook (sheets in order), so readers can restore
+    the order pd.read_excel would have returned.
+    """
+    sheets = pd.read_excel(data_file, sheet_name=None, usecols=lambda c: c in COLUMNS)
+    dfs = [df for name, df in sheets.items() if str(name).strip().isdigit()]
+    df = pd.concat(dfs, ignore_index=True)
+    for col in COLUMNS:
+        if col not in df.columns:
+            df[col] = None
+    df = df[COLUMNS]
+
+    datum = pd.to_datetime(df['Datum'], format='%Y-%m-%d %H:%M:%S', errors='coerce')
+    # Cells that are not in the strict format fall back to pandas' parser
+    unparsed = datum.isna() & df['Datum'].notna()
+    if unparsed.any():
+        datum[unparsed] = pd.to_datetime(df.loc[unparsed, 'Datum'], errors='coerce')
+    df['Datum'] = datum.astype('datetime64[ns]')
+
+    for col in COLUMNS[1:]:
+        df[col] = df[col].map(lambda v: None if pd.isna(v) else str(v)).astype(object)
+
+    df['row'] = pd.RangeIndex(len(df), dtype='int64')
+    df = df.dropna(subset=['Datum']).sort_values('Datum', kind='stable')
+
+    schema = pa.schema([('Datum', pa.timestamp('ns'))] +
+                       [(col, pa.string()) for col in COLUMNS[1:]] +
+                       [('row', pa.int64())])
+    for (year, month), part in df.groupby([df['Datum'].dt.year, df['Datum'].dt.month], sort=True):
+        part_dir = target_dir / f"year={year}" / f"month={month:02d}"
+        part_dir.mkdir(parents=True, exist_ok=True)
+        table = pa.Table.from_pandas(part, schema=schema, preserve_index=False)
+        pq.write_table(table, part_dir / "part-0.parquet", row_group_size=10_000)
+
+
+def workbook_sha256(data_file) -> str:
+    """SHA-256 of the workbook, taken from the manifest while mtime/size still match."""
+    st = Path(data_file).stat()
+    manifest = _read_manifest()
+    if manifest and manifest["mtime_ns"] == st.st_mtime_ns and manifest["size"] == st.st_size:
+        return manifest["sha256"]
+    return file_sha256(data_file)
+
+
+def ensure_workbook_cache(data_file) -> Path:
+    """
+    Returns the directory of the columnar copy of the workbook, converting it
+    first if there is none or if the workbook changed (mtime/size, and if
+    those differ, its SHA-256).
+    """
+    st = Path(data_file).stat()
+    manifest = _read_manifest()
+    if manifest and manifest.get("version") == CACHE_VERSION:
+        if manifest["mtime_ns"] == st.st_mtime_ns and manifest["size"] == st.st_size:
+            return cache_dir
+        sha256 = file_sha256(data_file)
+        if manifest["sha256"] == sha256:
+            # Touched but not changed, no need to convert again
+            manifest["mtime_ns"], manifest["size"] = st.st_mtime_ns, st.st_size
+            _write_manifest(cache_dir, manifest)
+            return cache_dir
+    else:
+        sha256 = file_sha256(data_file)
+
+    print(f"Converting '{data_file}' to Parquet (one-time step, this will take a few minutes)...")
+    tmp_dir = cache_dir.with_name(cache_dir.name + ".tmp")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    tmp_dir.mkdir(parents=True)
+    _convert(data_file, tmp_dir)
+    _write_manifest(tmp_dir, {"version": CACHE_VERSION, "mtime_ns": st.st_mtime_ns,
+                              "size": st.st_size, "sha256": sha256})
+    shutil.rmtree(cache_dir, ignore_errors=True)
+    tmp_dir.rename(cache_dir)
+    print(f"Saved Parquet cache to '{cache_dir}'")
+    return cache_dir
+
+
+def _partition_month(path: Path):
+    """(year, month) of a year=YYYY/month=MM/part-0.parquet file."""
+    return int(path.parent.parent.name[5:]), int(path.parent.name[6:])
+
+
+def workbook_months(data_file):
+    """Sorted (year, month) of every month with rows in the workbook."""
+    root = ensure_workbook_cache(data_file)
+    return sorted(_partition_month(f) for f in root.glob("year=*/month=*/part-0.parquet"))
+
+
+def read_traffic_rows(data_file, start=None, end=None, columns=None) -> pd.DataFrame:
+    """
+    Loads rows with start <= Datum <= end (either bound may be None) from the
+    Parquet copy of the workbook. Only the month partitions overlapping the
+    range are opened and the Datum filter is pushed down to the row groups.
+    Rows come back in workbook order with a parsed 'Datum' column.
+    """
+    root = ensure_workbook_cache(data_file)
+    files = sorted(root.glob("year=*/month=*/part-0.parquet"))
+    if start is not None or end is not None:
+        lo = (start.year, start.month) if start is not None else (0, 0)
+        hi = (end.year, end.month) if end is not None else (9999, 12)
+        files = [f for f in files if lo <= _partition_month(f) <= hi]
+
+    columns = list(columns or COLUMNS)
+    if 'Datum' not in columns:
+        columns.insert(0, 'Datum')
+    if not files:
+        return pd.DataFrame(columns=columns)
+
+    condition = None
+    if start is not None:
+        condition = ds.field('Datum') >= pa.scalar(pd.Timestamp(start).as_unit('ns'), pa.timestamp('ns'))
+    if end is not None:
+        upper = ds.field('Datum') <= pa.scalar(pd.Timestamp(end).as_unit('ns'), pa.timestamp('ns'))
+        condition = upper if condition is None else condition & upper
+
+    dataset = ds.dataset([str(f) for f in files], format="parquet")
+    table = dataset.to_table(columns=columns + ['row'], filter=condition)
+    df = table.to_pandas().sort_values('row', kind='stable')
+    return df.drop(columns='row').reset_index(drop=True)
@@ -0,0 +1,205 @@
+import re
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+from bs4 import BeautifulSoup
+
+# Tags whose content html.parser/BeautifulSoup treat specially; documents with
+# these (or anything else the fast path does not understand) go to BeautifulSoup
+_SPECIAL_TAGS = {'script', 'style', 'template', 'textarea', 'pre', 'title', 'plaintext', 'xmp'}
+_VOID_TAGS = {'br', 'hr', 'img'}
+_OTHER_EMPTY_TAGS = {'area', 'base', 'col', 'embed', 'input', 'keygen', 'link', 'menuitem', 'meta',
+                     'param', 'source', 'track', 'wbr', 'basefont', 'bgsound', 'command', 'frame',
+                     'image', 'isindex', 'nextid', 'spacer'}
+_ENTITIES = {'amp': '&', 'lt': '<', 'gt': '>', 'quot': '"', 'nbsp': '\xa0'}
+
+_token_rx = re.compile(
+    r"<(/?)([a-zA-Z][a-zA-Z0-9]*)"
+    r"((?:\s+[a-zA-Z_][-a-zA-Z0-9_.]*(?:\s*=\s*(?:\"[^\"<>]*\"|'[^'<>]*'|[^\s\"'=<>`]+))?)*)"
+    r"\s*(/?)>"
+    r"|([^<]+)"
+)
+_entity_rx = re.compile(r"&(?:(amp|lt|gt|quot|nbsp);)?")
+
+
+class _Fallback(Exception):
+    pass
+
+
+def join_columns(df: pd.DataFrame, columns) -> pd.Series:
+    """
+    Vectorized equivalent of df[columns].apply(lambda row: ' '.join(row.dropna().astype(str)), axis=1).
+    """
+    result = np.full(len(df), '', dtype=object)
+    filled = np.zeros(len(df), dtype=bool)
+    for col in columns:
+        present = df[col].notna().to_numpy()
+        values = df[col].to_numpy(dtype=object)[present].astype(str).astype(object)
+        both = filled[present]
+        joined = result[present]
+        joined[both] = joined[both] + ' ' + values[both]
+        joined[~both] = values[~both]
+        result[present] = joined
+        filled |= present
+    return pd.Series(result, index=df.index, dtype=object)
+
+
+def _unescape(text: str) -> str:
+    def replace(m):
+        if m.group(1) is None:
+            raise _Fallback()
+        return _ENTITIES[m.group(1)]
+    return _entity_rx.sub(replace, text)
+
+
+def _parse(html: str):
+    """
+    Tokenizes simple, well-formed HTML into a tree of [tag, children] lists with
+    text children as str, built the way BeautifulSoup's html.parser builder
+    would. Raises _Fallback on anything outside that subset (comments, unknown
+    entities, unbalanced or special tags, nested <p>).
+    """
+    root = ['[document]', []]
+    stack = [root]
+    in_p = False
+    pos, end = 0, len(html)
+    while pos < end:
+        m = _token_rx.match(html, pos)
+        if m is None:
+            raise _Fallback()
+        pos = m.end()
+
+        text = m.group(5)
+        if text is not None:
+            stack[-1][1].append(_unescape(text) if '&' in text else text)
+            continue
+
+        closing, name, self_closing = m.group(1), m.group(2).lower(), m.group(4)
+        if name in _SPECIAL_TAGS or name in _OTHER_EMPTY_TAGS:
+            raise _Fallback()
+        if closing:
+            if self_closing or name in _VOID_TAGS or stack[-1][0] != name:
+                raise _Fallback()
+            stack.pop()
+            if name == 'p':
+                in_p = False
+            continue
+
+        node = [name, []]
+        stack[-1][1].append(node)
+        if self_closing or name in _VOID_TAGS:
+            continue
+        if name == 'p':
+            if in_p:
+                raise _Fallback()
+            in_p = True
+        stack.append(node)
+
+    if len(stack) != 1:
+        raise _Fallback()
+    return root
+
+
+def _iter_tags(node, name):
+    for child in node[1]:
+        if isinstance(child, list):
+            if child[0] == name:
+                yield child
+            yield from _iter_tags(child, name)
+
+
+def _strings(node):
+    for child in node[1]:
+        if isinstance(child, list):
+            yield from _strings(child)
+        else:
+            yield child
+
+
+def _get_text(node) -> str:
+    """Same as Tag.get_text(strip=True)."""
+    return ''.join(s for s in (s.strip() for s in _strings(node)) if s)
+
+
+def _string(node):
+    """Same as Tag.string: the only string below a chain of single children."""
+    while len(node[1]) == 1:
+        child = node[1][0]
+        if not isinstance(child, list):
+            return child
+        node = child
+    return None
+
+
+def _paragraphs_fast(html: str, skip_links: bool):
+    root = _parse(html)
+    kept_lines = []
+    for p in _iter_tags(root, 'p'):
+        if skip_links:
+            if next(_iter_tags(p, 'a'), None) is not None:
+                continue
+            strong = next(_iter_tags(p, 'strong'), None)
+            if strong is not None:
+                string = _string(strong)
+                if string and len(string.strip().split()) <= 3:
+                    continue
+        text = _get_text(p)
+        if text:
+            kept_lines.append(text)
+    return kept_lines
+
+
+def _paragraphs_soup(html: str, skip_links: bool):
+    soup = BeautifulSoup(html, "html.parser")
+    if not skip_links:
+        return [p.get_text(strip=True) for p in soup.find_all("p") if p.get_text(strip=True)]
+
+    kept_lines = []
+    for p in soup.find_all("p"):
+        if p.find("a"):
+            p.decompose()
+            continue
+        strong = p.find("strong")
+        if strong and strong.string:
+            word_count = len(strong.string.strip().split())
+            if word_count <= 3:
+                strong.decompose()
+                if not p.get_text(strip=True):
+                    p.decompose()
+                continue
+        text = p.get_text(strip=True)
+        if text:
+            kept_lines.append(text)
+    return kept_lines
+
+
+def extract_paragraphs(html: str, skip_links: bool = False):
+    """
+    Returns the stripped text of every non-empty <p> in html. With skip_links,
+    paragraphs containing a link or starting with a short (<= 3 words) <strong>
+    heading are dropped, as get_final_traffic_text always did. Uses a small
+    tokenizer for the plain HTML of the bulletins and BeautifulSoup for
+    everything else; both give the same result.
+    """
+    try:
+        return _paragraphs_fast(html, skip_links)
+    except _Fallback:
+        return _paragraphs_soup(html, skip_links)
+
+
+def format_lines(lines) -> str:
+    processed_lines = []
+    for line in lines:
+        line = line.strip()
+        if line:
+            if line[-1] not in {'.', ',', '?', '!'}:
+                line += '.'
+            line = line[0].upper() + line[1:]
+            processed_lines.append(line)
+    return '\n'.join(processed_lines)
+
+
+@lru_cache(maxsize=1 << 16)
+def html_to_report(html: str, skip_links: bool = False) -> str:
+    """Cleans one combined HTML bulletin into report text. Repeated bulletins are cleaned once."""
+    return format_lines(extract_paragraphs(html, skip_links))
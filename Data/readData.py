@@ -1,94 +1,47 @@
 import pandas as pd
+import numpy as np
 from datetime import datetime, timedelta
-import Levenshtein
-from bs4 import BeautifulSoup
-from striprtf.striprtf import rtf_to_text
-import locale, re
 from tqdm import tqdm
-from sklearn.feature_extraction.text import HashingVectorizer
-import pickle
-from pathlib import Path
+from itertools import islice
+from concurrent.futures import ProcessPoolExecutor
+from Data.htmlClean import join_columns, html_to_report
+from Data.excelCache import read_traffic_rows, workbook_months
+from Data.reportCache import cache_key, load_reports, save_reports, shard_name
+from Data.similarity import PairScorer, TopPairs, select_medoid, text_key
+from Data.rtfIndex import load_month_index, find_report, iter_reports
+from Data.rtfParse import month_dir
 
 data_file = "./Data/RTVSlo/Podatki - PrometnoPorocilo_2022_2023_2024.xlsx"
 
+# Report pairs scored at a time by analyze_reports(top_k=...)
+SIMILARITY_CHUNK = 2048
+# Real reports are read month directory by month directory, so one filed in the
+# directory after its stamp's month is at most this far behind those read before it
+REAL_REPORT_LAG = timedelta(days=62)
+
 def get_final_traffic_text(input_time_str, threshold=0.8):
     try:
-        t_start = datetime.strptime(input_time_str, "%Y-%m-%d %H:%M:%S")
-
-        df = pd.read_excel(data_file, sheet_name=f"{t_start.year}")
-
-        df['Datum'] = pd.to_datetime(df['Datum'], format='%Y-%m-%d %H:%M:%S', errors='coerce')
-
         input_time = datetime.strptime(input_time_str, "%Y-%m-%d %H:%M:%S")
         start_time = input_time - timedelta(minutes=5)
-        mask = (df['Datum'] >= start_time) & (df['Datum'] <= input_time)
-        filtered_df = df.loc[mask]
+
+        # Only the rows of the 5-minute window are read from the Parquet cache
+        filtered_df = read_traffic_rows(data_file, start_time, input_time)
         # Filter out columns where all values are NaN
         filtered_df = filtered_df.dropna(axis=1, how='all')
 
         columns1 = [col for col in ['A1', 'B1', 'C1'] if col in filtered_df.columns]
         columns2 = [col for col in ['A2', 'B2', 'C2'] if col in filtered_df.columns]
 
-        filtered_df['Combined1'] = filtered_df[columns1].apply(
-            lambda row: ' '.join(row.dropna().astype(str)), axis=1
-        )
-        filtered_df['Combined2'] = filtered_df[columns2].apply(
-            lambda row: ' '.join(row.dropna().astype(str)), axis=1
-        )
+        filtered_df['Combined1'] = join_columns(filtered_df, columns1)
+        filtered_df['Combined2'] = join_columns(filtered_df, columns2)
 
         combined_values = filtered_df['Combined1'].tolist()
-        similarity_matrix = []
-
-        for i in range(len(combined_values)):
-            row_similarities = []
-            for j in range(len(combined_values)):
-                similarity = Levenshtein.ratio(combined_values[i], combined_values[j])
-                row_similarities.append(similarity)
-            similarity_matrix.append(row_similarities)
-
-        all_above_threshold = all(
-            similarity >= threshold for row in similarity_matrix for similarity in row if row != similarity_matrix[0]
-        )
 
         if combined_values:
-            if all_above_threshold:
-                # Use the most similar row
-                similarity_sums = [sum(row) for row in similarity_matrix]
-                max_similarity_index = similarity_sums.index(max(similarity_sums))
-                selected_combined = combined_values[max_similarity_index]
-            else:
-                # Use the latest line
-                selected_combined = combined_values[-1]
-
-            kept_lines = []
-
-            soup = BeautifulSoup(selected_combined, "html.parser")
-            for p in soup.find_all("p"):
-                if p.find("a"):
-                    p.decompose()
-                    continue
-                strong = p.find("strong")
-                if strong and strong.string:
-                    word_count = len(strong.string.strip().split())
-                    if word_count <= 3:
-                        strong.decompose()
-                        if not p.get_text(strip=True):
-                            p.decompose()
-                        continue
-                text = p.get_text(strip=True)
-                if text:
-                    kept_lines.append(text)
-
-            processed_lines = []
-            for line in kept_lines:
-                line = line.strip()
-                if line:
-                    if line[-1] not in {'.', ',', '?', '!'}:
-                        line += '.'
-                    line = line[0].upper() + line[1:] if line else line
-                    processed_lines.append(line)
-
-            final_text = '\n'.join(processed_lines)
+            # The most similar row if all rows are similar enough, otherwise the latest line
+            selected_combined = combined_values[select_medoid(combined_values, threshold)]
+
+            final_text = html_to_report(selected_combined, skip_links=True)
             return final_text
         else:
             return None
@@ -97,208 +50,352 @@ def get_final_traffic_text(input_time_str, threshold=0.8):
         print(f"Error reading {data_file}: {e}")
         return None
 
-MARKER = "Podatki o prometu."
-
 def get_real_traffic_report(input_time_str: str):
     t_start = datetime.strptime(input_time_str, "%Y-%m-%d %H:%M:%S")
     t_end   = t_start + timedelta(minutes=15)
 
-    # Slovene month name
-    try:
-        locale.setlocale(locale.LC_TIME, "sl_SI.UTF-8")
-        month_sl = t_start.strftime("%B").capitalize()
-    except locale.Error:
-        month_sl = ["Januar","Februar","Marec","April","Maj","Junij",
-                    "Julij","Avgust","September","Oktober","November","December"][t_start.month-1]
-
-    dir_path = Path(f"./Data/RTVSlo/Podatki - rtvslo.si/Promet {t_start.year}/{month_sl} {t_start.year}")
+    dir_path = month_dir(t_start.year, t_start.month)
     if not dir_path.is_dir():
         raise FileNotFoundError(dir_path.resolve())
 
-    stamp_rx = re.compile(
-        r"(\d{1,2})\.\s*(\d{1,2})\.\s*(\d{4})\s+[\t ]+\s*(\d{1,2})\.(\d{2})"
-    )
+    found = find_report(load_month_index(dir_path), t_start, t_end)
+    if found is None:
+        return None
 
-    for rtf_file in sorted(dir_path.glob("*.rtf")):
-        try:
-            with rtf_file.open("r", encoding="utf-8", errors="ignore") as f:
-                raw = rtf_to_text(f.read())
-        except Exception:
-            continue
+    name, stamp, body = found
+    print(f"Found traffic report in {name} at {stamp}")
+    return body
 
-        # Is this file in the time window?
-        for m in stamp_rx.finditer(raw):
-            d, mth, y, h, mi = map(int, m.groups())
-            try:
-                stamp = datetime(y, mth, d, h, mi)
-            except ValueError:
-                continue
-            if t_start <= stamp <= t_end:
-                # ── TRIM HERE ────────────────────────────────────────────
-                body = raw.split(MARKER, 1)[-1]           # everything after header
-                body = body.lstrip()                      # drop leading newlines/spaces
-                body = "\n".join(ln for ln in body.splitlines() if ln.strip())  # keep only non-empty lines
-                print(f"Found traffic report in {rtf_file.name} at {stamp}")
-                return body
 
-    return None
+def iter_real_reports(start_date: datetime, end_date: datetime, workers: int = 1):
+    """
+    Yields (timestamp, report) for every RTF report in the months from
+    start_date to end_date, one month directory at a time, in the order of
+    the real report cache: files in directory order, stamps in order of
+    appearance. Within a month a repeated stamp keeps its first position and
+    the body of its last file.
+    Files are read through the on-disk RTF index, so only new or changed files
+    are decoded. With workers > 1 (None = all cores) decoding runs in a
+    process pool; the result is the same as the serial path.
+    """
+    executor = None
+    if workers is None or workers > 1:
+        executor = ProcessPoolExecutor(max_workers=workers)
+
+    try:
+        # Iterate through the years and months in the requested date range
+        for year in range(start_date.year, end_date.year + 1):
+            start_month = start_date.month if year == start_date.year else 1
+            end_month = end_date.month if year == end_date.year else 12
+            for month in range(start_month, end_month + 1):
+                dir_path = month_dir(year, month)
+                if not dir_path.is_dir():
+                    continue
 
+                # A stamp found in several files keeps the body of the last one.
+                # Indexed bodies keep trailing whitespace, which the cache never did
+                month_reports = {}
+                for stamp, body in iter_reports(load_month_index(dir_path, executor)):
+                    month_reports[stamp] = body.rstrip()
+                yield from month_reports.items()
+    finally:
+        if executor is not None:
+            executor.shutdown()
 
-def preload_real_reports(start_date: datetime, end_date: datetime):
+
+def preload_real_reports(start_date: datetime, end_date: datetime, workers: int = 1):
     """
-    Scans all RTF files within a date range and loads them into a dictionary
-    mapping timestamps to report content. This avoids repeated file access.
+    Loads all RTF reports of the months from start_date to end_date into a
+    dictionary mapping timestamps to report content, in cache order (see
+    iter_real_reports).
     """
     print("Pre-loading all real reports from RTF files...")
-    report_cache = {}
+    report_cache = dict(iter_real_reports(start_date, end_date, workers))
+    print(f"Finished pre-loading. Found {len(report_cache)} real reports.")
+    return report_cache
 
-    # Slovene month name setup
-    try:
-        locale.setlocale(locale.LC_TIME, "sl_SI.UTF-8")
-    except locale.Error:
-        print("Slovene locale not found, using manual month names.")
-
-    stamp_rx = re.compile(r"(\d{1,2})\.\s*(\d{1,2})\.\s*(\d{4})\s+[\t ]+\s*(\d{1,2})\.(\d{2})")
-    MARKER = "Podatki o prometu."
-
-    # Iterate through the years and months in the requested date range
-    for year in range(start_date.year, end_date.year + 1):
-        start_month = start_date.month if year == start_date.year else 1
-        end_month = end_date.month if year == end_date.year else 12
-        for month in range(start_month, end_month + 1):
-
-            current_dt = datetime(year, month, 1)
-            try:
-                month_sl = current_dt.strftime("%B").capitalize()
-            except ValueError:  # Handle manual months if locale fails
-                month_sl = ["Januar", "Februar", "Marec", "April", "Maj", "Junij",
-                            "Julij", "Avgust", "September", "Oktober", "November", "December"][month - 1]
-
-            dir_path = Path(f"./Data/RTVSlo/Podatki - rtvslo.si/Promet {year}/{month_sl} {year}")
-            if not dir_path.is_dir():
-                continue
 
-            for rtf_file in tqdm(sorted(dir_path.glob("*.rtf")), desc=f"Scanning {dir_path.name}", leave=False):
-                try:
-                    with rtf_file.open("r", encoding="utf-8", errors="ignore") as f:
-                        raw = rtf_to_text(f.read())
-                except Exception:
-                    continue
+def _generate_month(data_file: str, year: int, month: int):
+    """{timestamp: report} for every minute of one month of the workbook."""
+    month_start = pd.Timestamp(year, month, 1)
+    month_end = month_start + pd.offsets.MonthBegin(1) - pd.Timedelta(1, 'ns')
+    report_cache = {}
 
-                # Find all timestamps in the file
-                for m in stamp_rx.finditer(raw):
-                    d, mth, y, h, mi = map(int, m.groups())
-                    try:
-                        stamp = datetime(y, mth, d, h, mi)
-                    except ValueError:
-                        continue
+    # Only the month's Parquet partition is read
+    month_df = read_traffic_rows(data_file, month_start, month_end, columns=['Datum', 'A1', 'B1', 'C1'])
+    month_df['Datum'] = month_df['Datum'].dt.floor('T')
+    month_df.dropna(subset=['Datum'], inplace=True)
+    if month_df.empty:
+        return report_cache
 
-                    # Extract the report body and cache it
-                    body = raw.split(MARKER, 1)[-1].strip()
-                    body = "\n".join(ln for ln in body.splitlines() if ln.strip())
-                    report_cache[stamp] = body
+    # Combine the columns for all rows at once, then keep the last row of every minute
+    month_df['Combined1'] = join_columns(month_df, ['A1', 'B1', 'C1'])
+    latest = month_df.groupby('Datum', sort=True)['Combined1'].last()
 
-    print(f"Finished pre-loading. Found {len(report_cache)} real reports.")
+    for timestamp, selected_combined in tqdm(latest.items(), total=len(latest),
+                                             desc=f"Generating reports for {year}-{month:02d}"):
+        final_text = html_to_report(selected_combined)
+        if final_text:
+            report_cache[pd.to_datetime(timestamp)] = final_text
     return report_cache
 
 
-def preload_generated_reports(data_file: str):
+def iter_generated_reports(data_file: str, start_date: datetime = None, end_date: datetime = None):
     """
-    Reads the Excel data and pre-generates all possible traffic reports.
-    It now uses a cache file to avoid re-processing on subsequent runs.
+    Yields (timestamp, report) for the traffic reports between start_date and
+    end_date (either may be None) in time order, one month at a time.
+    Every month is kept as a shard of a cache keyed by the workbook hash and
+    CLEANING_VERSION (see Data/reportCache.py): months already on disk are
+    reused by any date range, only the missing months overlapping the range
+    are generated, and a stale cache is rebuilt automatically.
     """
-    # Define a path for our cache file
-    cache_file = Path("./generated_reports_cache.pkl")
+    key = cache_key(data_file)
+    lo = (start_date.year, start_date.month) if start_date is not None else (0, 0)
+    hi = (end_date.year, end_date.month) if end_date is not None else (9999, 12)
 
-    # 1. CHECK IF THE CACHE FILE EXISTS
-    if cache_file.is_file():
-        print(f"Loading pre-generated reports from cache: '{cache_file}'")
+    for year, month in workbook_months(data_file):
+        if not lo <= (year, month) <= hi:
+            continue
+        # 1. CHECK IF THIS MONTH IS ALREADY CACHED FOR THIS WORKBOOK AND CLEANING VERSION
         try:
-            with open(cache_file, 'rb') as f:
-                report_cache = pickle.load(f)
-            print(f"Successfully loaded {len(report_cache)} reports from cache.")
-            return report_cache
+            shard = load_reports(key, year, month, start_date, end_date)
         except Exception as e:
-            print(f"Warning: Could not load cache file. Re-generating. Error: {e}")
-
-    # 2. IF CACHE DOES NOT EXIST, RUN THE ORIGINAL SLOW PROCESS
-    print("No cache found. Pre-generating all reports from Excel data (this will take a few minutes)...")
-    report_cache = {}
+            print(f"Warning: Could not load {shard_name(year, month)} of cache '{key}'. Re-generating. Error: {e}")
+            shard = None
+        if shard is not None:
+            yield from shard.items()
+            continue
 
-    # Load the entire dataset from all sheets
-    all_dfs = [pd.read_excel(data_file, sheet_name=str(year), usecols=['Datum', 'A1', 'B1', 'C1', 'A2', 'B2', 'C2']) for
-               year in range(2022, 2025)]
-    full_df = pd.concat(all_dfs, ignore_index=True)
-    full_df['Datum'] = pd.to_datetime(full_df['Datum'], errors='coerce').dt.floor('T')
-    full_df.dropna(subset=['Datum'], inplace=True)
+        # 2. IF NOT, GENERATE THE MONTH FROM THE EXCEL DATA AND SAVE IT FOR NEXT TIME
+        month_reports = _generate_month(data_file, year, month)
+        try:
+            save_reports(key, year, month, month_reports)
+        except Exception as e:
+            print(f"Error: Could not save {shard_name(year, month)} to cache. Reason: {e}")
+        yield from ((ts, text) for ts, text in sorted(month_reports.items())
+                    if (start_date is None or ts >= start_date) and (end_date is None or ts <= end_date))
 
-    grouped = full_df.groupby('Datum')
 
-    for timestamp, group_df in tqdm(grouped, desc="Generating reports from Excel"):
-        input_time_str = pd.to_datetime(timestamp).strftime("%Y-%m-%d %H:%M:%S")
+def preload_generated_reports(data_file: str, start_date: datetime = None, end_date: datetime = None):
+    """
+    The traffic reports between start_date and end_date (either may be None)
+    as {timestamp: report}, in time order (see iter_generated_reports).
+    """
+    report_cache = dict(iter_generated_reports(data_file, start_date, end_date))
+    print(f"Loaded {len(report_cache)} pre-generated reports from cache '{cache_key(data_file)}'.")
+    return report_cache
 
-        columns1 = [col for col in ['A1', 'B1', 'C1'] if col in group_df.columns]
-        group_df['Combined1'] = group_df[columns1].apply(
-            lambda row: ' '.join(row.dropna().astype(str)), axis=1
-        )
 
-        if group_df['Combined1'].empty:
-            continue
+def _range_min(values, lo, hi):
+    """Vectorized min(values[lo:hi]) for arrays of non-empty ranges, using a sparse table."""
+    table = [values]
+    while 2 ** len(table) <= len(values):
+        half = 2 ** (len(table) - 1)
+        table.append(np.minimum(table[-1][:-half], table[-1][half:]))
 
-        selected_combined = group_df['Combined1'].iloc[-1]
-        soup = BeautifulSoup(selected_combined, "html.parser")
-        lines = [p.get_text(strip=True) for p in soup.find_all("p") if p.get_text(strip=True)]
+    result = np.empty(len(lo), dtype=values.dtype)
+    level = np.log2(hi - lo).astype(np.int64)
+    for k in np.unique(level):
+        mask = level == k
+        result[mask] = np.minimum(table[k][lo[mask]], table[k][hi[mask] - 2 ** k])
+    return result
 
-        processed_lines = []
-        for line in lines:
-            if line and line[-1] not in {'.', ',', '?', '!'}:
-                line += '.'
-            processed_lines.append(line[0].upper() + line[1:])
 
-        final_text = '\n'.join(processed_lines)
-        if final_text:
-            report_cache[pd.to_datetime(timestamp)] = final_text
+def match_reports(generated_stamps, real_stamps, window=timedelta(minutes=15)):
+    """
+    For every generated timestamp returns the position in real_stamps of the
+    first real report with gen_ts <= real_ts <= gen_ts + window, or -1.
+    "First" follows the order of real_stamps, exactly like scanning the real
+    report cache for each generated report, but both sides are sorted once and
+    matched with searchsorted instead of an O(G*R) loop.
+    """
+    gen = pd.DatetimeIndex(generated_stamps).as_unit('ns').to_numpy()
+    real = pd.DatetimeIndex(real_stamps).as_unit('ns').to_numpy()
+    result = np.full(len(gen), -1, dtype=np.int64)
+    if len(gen) == 0 or len(real) == 0:
+        return result
+
+    order = np.argsort(real, kind='stable')
+    real_sorted = real[order]
+    lo = np.searchsorted(real_sorted, gen, side='left')
+    hi = np.searchsorted(real_sorted, gen + np.timedelta64(window), side='right')
+    found = lo < hi
+
+    if np.all(order[1:] > order[:-1]):
+        # Cache is already chronological, so the earliest stamp is the first match
+        result[found] = order[lo[found]]
+    else:
+        result[found] = _range_min(order, lo[found], hi[found])
+    return result
+
+
+def iter_matched_pairs(generated, real, window=timedelta(minutes=15), lag=REAL_REPORT_LAG,
+                       chunk_size: int = SIMILARITY_CHUNK):
+    """
+    Yields (timestamp, generated_report, real_report) for every generated
+    report that has a real report within window after it, pairing it with the
+    first such report in the order of real, as match_reports does over the
+    whole real report cache (a repeated stamp keeps its first position and
+    its last body, like the cache dict).
+
+    generated is a time-ordered (timestamp, text) iterable, e.g.
+    iter_generated_reports; real is a (timestamp, text) iterable in cache
+    order, e.g. iter_real_reports. Both are read lazily: generated reports are
+    matched chunk_size at a time, once real has been read to a stamp more
+    than lag past the chunk's last window. Only the real reports that can
+    still match are kept.
+
+    This assumes no real report comes after one stamped more than lag later.
+    Real reports that break it are counted and reported at the end; the
+    pairs of generated reports before them may differ from a full scan.
+    """
+    real = iter(real)
+    generated = iter(generated)
+    # Real reports that can still match, in cache order; stamps_ns holds their stamps as datetime64
+    stamps, bodies, position = [], [], {}
+    stamps_ns = np.empty(0, dtype='datetime64[ns]')
+    newest = None
+    matched_until = None
+    late = 0
+
+    while True:
+        chunk = list(islice(generated, chunk_size))
+        if not chunk:
+            break
+        horizon = chunk[-1][0] + window
+        read = len(stamps)
+        while newest is None or newest - lag <= horizon:
+            item = next(real, None)
+            if item is None:
+                break
+            real_ts, real_report = item
+            if matched_until is not None and real_ts <= matched_until:
+                late += 1
+            if real_ts in position:
+                bodies[position[real_ts]] = real_report
+                continue
+            position[real_ts] = len(stamps)
+            stamps.append(real_ts)
+            bodies.append(real_report)
+            newest = real_ts if newest is None else max(newest, real_ts)
+        if len(stamps) > read:
+            stamps_ns = np.concatenate([stamps_ns, pd.DatetimeIndex(stamps[read:]).as_unit('ns').to_numpy()])
+
+        matches = match_reports([gen_ts for gen_ts, _ in chunk], stamps_ns, window)
+        for (gen_ts, gen_report), i in zip(chunk, matches):
+            if i >= 0:
+                yield gen_ts, gen_report, bodies[i]
+        matched_until = horizon
+
+        # Later generated reports are after this chunk, so earlier real reports cannot match them
+        keep = np.flatnonzero(stamps_ns >= np.datetime64(pd.Timestamp(chunk[-1][0]).as_unit('ns')))
+        stamps = [stamps[i] for i in keep]
+        bodies = [bodies[i] for i in keep]
+        stamps_ns = stamps_ns[keep]
+        position = {real_ts: i for i, real_ts in enumerate(stamps)}
+
+    if late:
+        print(f"Warning: {late} real reports came after reports stamped more than {lag} later; "
+              f"matches before them may differ from a full scan of the real reports.")
+
+
+def _top_matches(pairs, scorer: PairScorer, top_k: int, chunk_size: int):
+    """
+    The top_k best of the (timestamp, generated, real) pairs, at most one per
+    real report, scored chunk by chunk so only one chunk of pairs and the
+    current top_k are held at a time. The frame's attrs hold the counts of
+    the whole range (see match_counts).
+    """
+    top = TopPairs(top_k)
+    matched = kept = 0
+    unique = set()
+    pairs = iter(pairs)
+
+    while True:
+        chunk = list(islice(pairs, chunk_size))
+        if not chunk:
+            break
+        matched += len(chunk)
+        chunk = [pair for pair in chunk if len(pair[1]) < 1000]
+        kept += len(chunk)
+        if not chunk:
+            continue
 
-    # 3. SAVE THE NEWLY GENERATED DATA TO THE CACHE FILE FOR NEXT TIME
-    print(f"Finished generating {len(report_cache)} reports. Saving to cache file...")
-    try:
-        with open(cache_file, 'wb') as f:
-            pickle.dump(report_cache, f)
-        print(f"Successfully saved cache to '{cache_file}'")
-    except Exception as e:
-        print(f"Error: Could not save cache file. Reason: {e}")
+        keys = [text_key(real_report) for _, _, real_report in chunk]
+        unique.update(keys)
+        similarities = scorer.score([gen_report for _, gen_report, _ in chunk],
+                                    [real_report for _, _, real_report in chunk])
+        for i in np.flatnonzero(similarities > top.threshold()):
+            top.offer(float(similarities[i]), keys[i], chunk[i])
 
-    return report_cache
+    if not matched:
+        print("No pairs of generated and real reports could be matched.")
+        return pd.DataFrame()
+    print(f"\nFiltered out {matched - kept} reports with generated_report length >= 1000 characters.")
+    print(f"Original matched pairs found: {kept}")
+    rows = [{
+        'timestamp': gen_ts.strftime("%Y-%m-%d %H:%M:%S"),
+        'generated_report': gen_report,
+        'real_report': real_report,
+        'hash_similarity': similarity,
+    } for similarity, (gen_ts, gen_report, real_report) in top.items()]
+    print(f"Kept the {len(rows)} best of {len(unique)} unique matches.")
+    results_df = pd.DataFrame(rows, columns=['timestamp', 'generated_report', 'real_report', 'hash_similarity'])
+    results_df.attrs.update(matched=matched, kept=kept, unique=len(unique))
+    return results_df
+
+
+def match_counts(results_df) -> dict:
+    """
+    {'matched', 'kept', 'unique'} of an analyze_reports result: the matched
+    pairs, those left after the length filter, and the unique matches among
+    them, which with top_k can be more than the rows returned.
+    """
+    n = len(results_df)
+    return {key: results_df.attrs.get(key, n) for key in ('matched', 'kept', 'unique')}
 
 
-def analyze_reports(start_date_str: str, end_date_str: str):
+def analyze_reports(start_date_str: str, end_date_str: str, workers: int = 1, top_k: int = None,
+                    chunk_size: int = SIMILARITY_CHUNK, tfidf: bool = False, cosine: bool = True):
     """
-    Performs an analysis using full pre-loading of both generated
-    and real reports, with a fast HashingVectorizer for similarity.
+    Performs an analysis of the generated and real reports, streamed and
+    matched month by month, with a fast HashingVectorizer for similarity.
     Includes de-duplication and length filtering.
+
+    With top_k, pairs are scored chunk_size at a time and only the top_k best
+    unique matches are kept and returned (best first), instead of every
+    unique match.
+
+    tfidf and cosine select the similarity (see Data.similarity.PairScorer);
+    the defaults give the cosine of the hashed term counts.
     """
     start_dt = datetime.strptime(start_date_str, "%Y-%m-%d %H:%M:%S")
     end_dt = datetime.strptime(end_date_str, "%Y-%m-%d %H:%M:%S")
 
-    # 1. PRE-LOAD
-    real_report_cache = preload_real_reports(start_dt, end_dt)
-    generated_report_cache = preload_generated_reports(data_file)
-
-    # 2. MATCH
-    print("Matching cached reports...")
-    results_list = []
-
-    for gen_ts, gen_report in tqdm(generated_report_cache.items(), desc="Matching reports"):
-        if not (start_dt <= gen_ts <= end_dt):
-            continue
-        for real_ts, real_report in real_report_cache.items():
-            if gen_ts <= real_ts <= gen_ts + timedelta(minutes=15):
-                results_list.append({
-                    'timestamp': gen_ts.strftime("%Y-%m-%d %H:%M:%S"),
-                    'generated_report': gen_report,
-                    'real_report': real_report
-                })
-                break
+    # Real reports up to one match window past end_dt can still match
+    window = timedelta(minutes=15)
+    real_end_dt = end_dt + window
+
+    # TF-IDF weights are fitted on the real reports of the range before scoring
+    fit_texts = [report for _, report in iter_real_reports(start_dt, real_end_dt, workers)] if tfidf else None
+    scorer = PairScorer(tfidf=tfidf, cosine=cosine, fit_texts=fit_texts)
+
+    # 1. STREAM BOTH SIDES AND MATCH THEM AS THEY ARE READ
+    pairs = iter_matched_pairs(iter_generated_reports(data_file, start_dt, end_dt),
+                               iter_real_reports(start_dt, real_end_dt, workers), window)
+    if top_k is not None:
+        print(f"Calculating similarity in chunks of {chunk_size} pairs, keeping the best {top_k}...")
+        results_df = _top_matches(pairs, scorer, top_k, chunk_size)
+        print("Analysis complete.")
+        return results_df
+
+    # 2. COLLECT THE MATCHED PAIRS
+    print("Matching reports...")
+    results_list = [{
+        'timestamp': gen_ts.strftime("%Y-%m-%d %H:%M:%S"),
+        'generated_report': gen_report,
+        'real_report': real_report
+    } for gen_ts, gen_report, real_report in pairs]
 
     if not results_list:
         print("No pairs of generated and real reports could be matched.")
@@ -308,22 +405,21 @@ def analyze_reports(start_date_str: str, end_date_str: str):
 
     # FILTER BY GENERATED REPORT LENGTH
     initial_count = len(results_df)
+    results_df.attrs['matched'] = initial_count
     results_df = results_df[results_df['generated_report'].str.len() < 1000]
     print(f"\nFiltered out {initial_count - len(results_df)} reports with generated_report length >= 1000 characters.")
 
     # 3. SIMILARITY CALCULATION
     print(f"Calculating similarity for {len(results_df)} report pairs using HashingVectorizer...")
-    vectorizer = HashingVectorizer(stop_words='english', n_features=2 ** 18)
-    generated_vectors = vectorizer.transform(results_df['generated_report'])
-    real_vectors = vectorizer.transform(results_df['real_report'])
-    similarities = (generated_vectors * real_vectors.T).diagonal()
-    results_df['hash_similarity'] = similarities
+    results_df['hash_similarity'] = scorer.score(results_df['generated_report'], results_df['real_report'])
 
     # 4. FILTER FOR UNIQUE BEST MATCHES
     print(f"\nOriginal matched pairs found: {len(results_df)}")
-    results_df = results_df.sort_values(by='hash_similarity', ascending=False)
+    results_df = results_df.sort_values(by='hash_similarity', ascending=False, kind='stable')
+    results_df.attrs['kept'] = len(results_df)
     results_df = results_df.drop_duplicates(subset=['real_report'], keep='first')
+    results_df.attrs['unique'] = len(results_df)
     print(f"Filtered down to {len(results_df)} unique best matches.")
 
     print("Analysis complete.")
-    return results_df
\ No newline at end of file
+    return results_df
@@ -0,0 +1,127 @@
+"""
+Versioned store for the reports pre-generated from the Excel data.
+
+Each cache lives in its own directory named after a hash of the source
+workbook and CLEANING_VERSION, with one shard per month of reports
+(<key>/<YYYY-MM>/), each holding three flat files:
+    stamps.npy   sorted int64 timestamps (ns)
+    offsets.npy  int64 byte offsets into texts.bin (len(stamps) + 1)
+    texts.bin    UTF-8 report texts, back to back
+Shards are generated on first use and reused by every later date range. All
+three files are memory-mapped on load, so a date-range query only reads its slice.
+
+Usage: python -m Data.reportCache status|clear
+"""
+import argparse
+import shutil
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from Data.excelCache import workbook_sha256
+
+# Bump whenever the HTML cleaning in preload_generated_reports changes its output
+CLEANING_VERSION = 1
+
+store_dir = Path("./Data/cache/generated_reports")
+
+SHARD_FILES = ("stamps.npy", "offsets.npy", "texts.bin")
+
+
+def cache_key(data_file) -> str:
+    return f"{workbook_sha256(data_file)[:16]}-v{CLEANING_VERSION}"
+
+
+def shard_name(year: int, month: int) -> str:
+    return f"{year:04d}-{month:02d}"
+
+
+def save_reports(key: str, year: int, month: int, report_cache: dict):
+    """
+    Writes {timestamp: text} of one month as a shard of the cache with this
+    key (an empty month is stored too) and removes caches with other keys.
+    """
+    items = sorted(report_cache.items())
+    stamps = pd.DatetimeIndex([ts for ts, _ in items]).as_unit('ns').asi8
+    blobs = [text.encode('utf-8') for _, text in items]
+    offsets = np.zeros(len(blobs) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in blobs], out=offsets[1:])
+
+    key_dir = store_dir / key
+    for old in store_dir.iterdir() if store_dir.is_dir() else ():
+        if old != key_dir:
+            shutil.rmtree(old, ignore_errors=True)
+    # A cache written before shards existed kept its files in the key directory
+    for name in SHARD_FILES:
+        (key_dir / name).unlink(missing_ok=True)
+
+    shard_dir = key_dir / shard_name(year, month)
+    tmp_dir = shard_dir.with_name(shard_dir.name + ".tmp")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    tmp_dir.mkdir(parents=True)
+    np.save(tmp_dir / "stamps.npy", stamps)
+    np.save(tmp_dir / "offsets.npy", offsets)
+    with open(tmp_dir / "texts.bin", 'wb') as f:
+        f.write(b''.join(blobs))
+
+    shutil.rmtree(shard_dir, ignore_errors=True)
+    tmp_dir.rename(shard_dir)
+
+
+def load_reports(key: str, year: int, month: int, start=None, end=None):
+    """
+    Returns {pd.Timestamp: text} for start <= timestamp <= end (either bound may
+    be None) from the month's shard of the cache with this key, or None if
+    that shard has not been generated.
+    """
+    path = store_dir / key / shard_name(year, month)
+    if not (path / "texts.bin").is_file():
+        return None
+
+    stamps = np.load(path / "stamps.npy", mmap_mode='r')
+    offsets = np.load(path / "offsets.npy", mmap_mode='r')
+    lo = 0 if start is None else int(np.searchsorted(stamps, pd.Timestamp(start).as_unit('ns').value, 'left'))
+    hi = len(stamps) if end is None else int(np.searchsorted(stamps, pd.Timestamp(end).as_unit('ns').value, 'right'))
+    if lo >= hi:
+        return {}
+
+    texts = np.memmap(path / "texts.bin", dtype=np.uint8, mode='r')
+    base = int(offsets[lo])
+    blob = texts[base:int(offsets[hi])].tobytes()
+    bounds = (offsets[lo:hi + 1] - base).tolist()
+    index = pd.to_datetime(np.asarray(stamps[lo:hi]), unit='ns')
+    return {ts: blob[bounds[i]:bounds[i + 1]].decode('utf-8') for i, ts in enumerate(index)}
+
+
+def cache_status(data_file):
+    """Prints every cache on disk, its shards and size, and whether it matches the current workbook."""
+    key = cache_key(data_file)
+    caches = sorted(p for p in store_dir.iterdir() if p.is_dir()) if store_dir.is_dir() else []
+    print(f"Workbook:    {data_file}")
+    print(f"Current key: {key}")
+    if not caches:
+        print("No generated report caches found.")
+        return
+
+    for path in caches:
+        shards = sorted(p for p in path.iterdir() if p.is_dir() and (p / "texts.bin").is_file())
+        size = sum(f.stat().st_size for f in path.rglob("*") if f.is_file())
+        count = sum(len(np.load(p / "stamps.npy", mmap_mode='r')) for p in shards)
+        status = "current" if path.name == key else "stale"
+        months = f"{shards[0].name}..{shards[-1].name}" if shards else "-"
+        print(f"{path.name}  {status:<7}  {len(shards):>3} months ({months})  "
+              f"{count:>9} reports  {size / 2 ** 20:8.1f} MiB")
+
+
+if __name__ == "__main__":
+    from Data.readData import data_file
+
+    parser = argparse.ArgumentParser(description="Inspect the generated report cache.")
+    parser.add_argument("command", choices=["status", "clear"])
+    parser.add_argument("--data-file", default=data_file)
+    args = parser.parse_args()
+
+    if args.command == "status":
+        cache_status(args.data_file)
+    else:
+        shutil.rmtree(store_dir, ignore_errors=True)
+        print(f"Removed '{store_dir}'")
@@ -0,0 +1,142 @@
+import pickle
+from datetime import datetime, timedelta
+from pathlib import Path
+import numpy as np
+from tqdm import tqdm
+from Data.rtfParse import parse_rtf_file
+
+# Bump when the parsing in Data.rtfParse or the index layout changes so stale indexes get rebuilt
+INDEX_VERSION = 2
+
+# Upper bound on files sent to a worker at once when decoding in parallel
+CHUNK_SIZE = 64
+
+index_dir = Path("./Data/cache/rtf_index")
+
+# In-process copies of the indexes, keyed by month directory
+_loaded = {}
+
+
+def _index_file(dir_path: Path) -> Path:
+    return index_dir / f"{dir_path.resolve().name}.pkl"
+
+
+def _build_lookup(index: dict):
+    """
+    Builds the sorted int64 timestamp array used for binary search, with the
+    file (position in sorted names) of every stamp and a key that orders
+    stamps by file name, then position in the file.
+    """
+    names = sorted(index["files"])
+    stamps = [index["files"][name][2] for name in names]
+    counts = np.array([len(s) for s in stamps], dtype=np.int64)
+    all_stamps = np.concatenate(stamps) if stamps else np.empty(0, dtype=np.int64)
+    files = np.repeat(np.arange(len(names)), counts)
+    positions = np.arange(len(all_stamps)) - np.repeat(np.cumsum(counts) - counts, counts)
+
+    # Orders stamps by (file, position) the way the file names sort
+    order_key = files * (int(counts.max()) if len(counts) else 0) + positions
+    order = np.lexsort((order_key, all_stamps))
+    index["names"] = names
+    index["stamps"] = all_stamps[order]
+    index["entry_files"] = files[order]
+    index["entry_keys"] = order_key[order]
+
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _to_ns(stamp: datetime) -> int:
+    return (stamp - _EPOCH) // timedelta(microseconds=1) * 1000
+
+
+def _to_datetime(stamp_ns: int) -> datetime:
+    return _EPOCH + timedelta(microseconds=stamp_ns // 1000)
+
+
+def load_month_index(dir_path: Path, executor=None) -> dict:
+    """
+    Returns the index of one month directory of RTF files. The index maps every
+    file name to (mtime_ns, size, stamps, body) and is stored on disk, so files
+    are only decoded again when they are new or their mtime/size changed.
+    If an executor (e.g. a ProcessPoolExecutor) is given, files are decoded
+    on its workers.
+    """
+    key = str(dir_path.resolve())
+    index = _loaded.get(key)
+    index_file = _index_file(dir_path)
+
+    if index is None and index_file.is_file():
+        try:
+            with open(index_file, 'rb') as f:
+                index = pickle.load(f)
+            if index.get("version") != INDEX_VERSION or index.get("dir") != key:
+                index = None
+        except Exception as e:
+            print(f"Warning: Could not load RTF index '{index_file}'. Rebuilding. Error: {e}")
+            index = None
+
+    if index is None:
+        index = {"version": INDEX_VERSION, "dir": key, "files": {}}
+
+    files = index["files"]
+    current = {}
+    for rtf_file in dir_path.glob("*.rtf"):
+        st = rtf_file.stat()
+        current[rtf_file.name] = (st.st_mtime_ns, st.st_size)
+
+    stale = [name for name, sig in current.items() if files.get(name, (None, None))[:2] != sig]
+    removed = [name for name in files if name not in current]
+
+    for name in removed:
+        del files[name]
+    stale.sort()
+    paths = [dir_path / name for name in stale]
+    if executor is not None and len(paths) > 1:
+        # map() hands out files in chunks and yields results in input order
+        chunksize = max(1, min(CHUNK_SIZE, len(paths) // 16))
+        parsed = executor.map(parse_rtf_file, paths, chunksize=chunksize)
+    else:
+        parsed = map(parse_rtf_file, paths)
+    for name, (stamps, body) in tqdm(zip(stale, parsed), total=len(stale),
+                                     desc=f"Indexing {dir_path.name}", leave=False, disable=not stale):
+        files[name] = current[name] + (stamps, body)
+
+    if stale or removed or "stamps" not in index:
+        _build_lookup(index)
+    if stale or removed:
+        try:
+            index_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = index_file.with_suffix(".tmp")
+            with open(tmp_file, 'wb') as f:
+                pickle.dump({"version": INDEX_VERSION, "dir": key, "files": files}, f)
+            tmp_file.replace(index_file)
+        except Exception as e:
+            print(f"Error: Could not save RTF index '{index_file}'. Reason: {e}")
+
+    _loaded[key] = index
+    return index
+
+
+def find_report(index: dict, t_start: datetime, t_end: datetime):
+    """
+    Returns (file name, stamp, body) of the first file, in sorted file name
+    order, that has a timestamp within [t_start, t_end], or None.
+    """
+    lo = int(np.searchsorted(index["stamps"], _to_ns(t_start), 'left'))
+    hi = int(np.searchsorted(index["stamps"], _to_ns(t_end), 'right'))
+    if lo >= hi:
+        return None
+
+    first = lo if hi - lo == 1 else lo + int(np.argmin(index["entry_keys"][lo:hi]))
+    name = index["names"][index["entry_files"][first]]
+    return name, _to_datetime(int(index["stamps"][first])), index["files"][name][3]
+
+
+def iter_reports(index: dict):
+    """Yields (stamp, body) in the order the files were originally scanned."""
+    files = index["files"]
+    for name in sorted(files):
+        _, _, stamps, body = files[name]
+        for stamp in stamps.tolist():
+            yield _to_datetime(stamp), body
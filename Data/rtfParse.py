@@ -0,0 +1,202 @@
+"""
+Parsing of the rtvslo.si RTF traffic bulletins: the timestamps in a
+bulletin and its report text, in one pass over the decoded file.
+
+Files are decoded by fast_rtf_to_text, which gives the same text as
+striprtf's rtf_to_text but takes runs of plain text at once instead of one
+character at a time. Files with pictures, binary data or hyperlink fields,
+which rtf_to_text rewrites before decoding, go to rtf_to_text itself. Both
+follow striprtf 0.0.33 (pinned in requirements.txt): font_table_group and
+stopping at the end of the document group are not in earlier releases.
+
+Month directories are named with a static table of Slovene month names
+instead of locale.setlocale/strftime('%B'), which is process-global and
+not thread-safe, and gave English names where the sl_SI locale is missing.
+Nothing here keeps state, so it is safe to call from thread and process pools.
+"""
+import codecs
+import re
+from pathlib import Path
+from typing import Optional
+import numpy as np
+from striprtf.striprtf import (FONTTABLE, charset_map, destinations, font_table_group, rtf_to_text,
+                               sectionchars, specialchars)
+
+MARKER = "Podatki o prometu."
+
+MONTHS_SL = ("Januar", "Februar", "Marec", "April", "Maj", "Junij",
+             "Julij", "Avgust", "September", "Oktober", "November", "December")
+
+rtf_root = Path("./Data/RTVSlo/Podatki - rtvslo.si")
+
+stamp_rx = re.compile(r"(\d{1,2})\.\s*(\d{1,2})\.\s*(\d{4})\s+[\t ]+\s*(\d{1,2})\.(\d{2})")
+
+DAYS_IN_MONTH = (31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+DAYS_BEFORE_MONTH = (0, 31, 59, 90, 120, 151, 181, 212, 243, 273, 304, 334)
+# Days from 0001-01-01 to 1970-01-01
+EPOCH_DAYS = 719162
+NS_PER_MINUTE = 60 * 10 ** 9
+
+NO_STAMPS = np.empty(0, dtype=np.int64)
+
+# rtf_to_text's tokens, except that plain text is matched as whole runs
+token_rx = re.compile(
+    r"\\([a-z]{1,32})(-?\d{1,10})?[ ]?|\\'([0-9a-f]{2})|\\([^a-z])|([{}])|[\r\n]+|([^\\{}\r\n]+|\\)",
+    re.IGNORECASE,
+)
+# Constructs rtf_to_text rewrites before decoding; files with them are left to it
+unsupported_rx = re.compile(r"\\pict|hyperlink", re.IGNORECASE)
+
+
+def month_dir(year: int, month: int) -> Path:
+    """Directory of one month of bulletins, e.g. Promet 2023/Januar 2023."""
+    return rtf_root / f"Promet {year}" / f"{MONTHS_SL[month - 1]} {year}"
+
+
+def parse_stamps(text: str) -> np.ndarray:
+    """
+    All valid 'D. M. YYYY  H.MM' timestamps in text, in order of appearance,
+    as int64 nanoseconds since the epoch (datetime64[ns] values). Matches
+    that are not a real date or time (e.g. 31. 2. or 25.00), or fall outside
+    the datetime64[ns] range of years 1678-2261, are skipped.
+    """
+    stamps = []
+    for d, mth, y, h, mi in stamp_rx.findall(text):
+        d, mth, y, h, mi = int(d), int(mth), int(y), int(h), int(mi)
+        if not (1678 <= y <= 2261 and 1 <= mth <= 12 and h <= 23 and mi <= 59):
+            continue
+        leap = y % 4 == 0 and (y % 100 != 0 or y % 400 == 0)
+        if not 1 <= d <= DAYS_IN_MONTH[mth - 1] + (mth == 2 and leap):
+            continue
+        # Days since 1970-01-01 in the proleptic Gregorian calendar
+        y1 = y - 1
+        days = (y1 * 365 + y1 // 4 - y1 // 100 + y1 // 400 - EPOCH_DAYS
+                + DAYS_BEFORE_MONTH[mth - 1] + (mth > 2 and leap) + d - 1)
+        stamps.append(((days * 24 + h) * 60 + mi) * NS_PER_MINUTE)
+    return np.array(stamps, dtype=np.int64) if stamps else NO_STAMPS
+
+
+def parse_body(text: str) -> str:
+    """The report text after MARKER, with empty lines removed."""
+    body = text.split(MARKER, 1)[-1].lstrip()
+    return "\n".join(ln for ln in body.splitlines() if ln.strip())
+
+
+def parse_rtf_text(text: str):
+    """(stamps, body) of a decoded bulletin, see parse_stamps and parse_body."""
+    return parse_stamps(text), parse_body(text)
+
+
+def fast_rtf_to_text(text: str, encoding: str = "cp1252") -> Optional[str]:
+    """
+    rtf_to_text(text) for the RTF of the bulletins: the same state machine
+    (groups, destinations, \\uc/\\u skips, \\'hh bytes in the font's code
+    page, special characters), stopping at the end of the document group.
+    Returns None for files it does not handle, see unsupported_rx.
+    """
+    if unsupported_rx.search(text):
+        return None
+
+    fonttbl = {font_id: charset_map.get(int(fcharset), encoding)
+               for font_id, fcharset, _ in FONTTABLE.findall(font_table_group(text))}
+    stack = []
+    default_font = current_font = None
+    ignorable = suppress_output = False
+    ucskip, curskip = 1, 0
+    hexes = []
+    out = []
+    depth = 0
+    in_document = False
+
+    for match in token_rx.finditer(text):
+        word, arg, _hex, char, brace, run = match.groups()
+        if hexes and not _hex:
+            out.append(bytes.fromhex("".join(hexes)).decode(fonttbl.get(current_font, encoding)))
+            hexes = []
+        if run:
+            if curskip > 0:
+                skipped = min(curskip, len(run))
+                curskip -= skipped
+                run = run[skipped:]
+            if run and not ignorable and not suppress_output:
+                out.append(run)
+        elif brace:
+            curskip = 0
+            if brace == "{":
+                depth += 1
+                in_document = True
+                stack.append((ucskip, ignorable, suppress_output))
+            else:
+                depth -= 1
+                if stack:
+                    ucskip, ignorable, suppress_output = stack.pop()
+                else:
+                    ucskip, ignorable = 0, True
+                if in_document and depth <= 0:
+                    break
+        elif char:
+            curskip = 0
+            if char in specialchars:
+                if char in sectionchars:
+                    current_font = default_font
+                if not ignorable:
+                    out.append(specialchars[char])
+            elif char == "*":
+                ignorable = True
+        elif word:
+            curskip = 0
+            if word in destinations:
+                ignorable = True
+            elif word == "ansicpg":
+                encoding = f"cp{arg}"
+                try:
+                    codecs.lookup(encoding)
+                except LookupError:
+                    encoding = "utf8"
+            if ignorable or suppress_output:
+                pass
+            elif word in specialchars:
+                out.append(specialchars[word])
+            elif word == "uc":
+                ucskip = int(arg)
+            elif word == "u":
+                if arg is not None:
+                    c = int(arg)
+                    out.append(chr(c + 0x10000 if c < 0 else c))
+                curskip = ucskip
+            elif word == "f":
+                current_font = arg
+            elif word == "deff":
+                default_font = arg
+            elif word == "colortbl":
+                suppress_output = True
+        elif _hex:
+            if curskip > 0:
+                curskip -= 1
+            elif not ignorable:
+                hexes.append(_hex)
+    return "".join(out)
+
+
+def decode_rtf(text: str) -> str:
+    """The plain text of an RTF document, by fast_rtf_to_text or else rtf_to_text."""
+    try:
+        decoded = fast_rtf_to_text(text)
+    except Exception:
+        decoded = None
+    return decoded if decoded is not None else rtf_to_text(text)
+
+
+def parse_rtf_file(rtf_file: Path):
+    """
+    Decodes one RTF bulletin and returns (stamps, body), where stamps are all
+    valid timestamps found in the text as int64 nanoseconds (in order of
+    appearance) and body is the report text after the MARKER with empty
+    lines removed. Returns (empty stamps, None) if the file cannot be read.
+    """
+    try:
+        with rtf_file.open("r", encoding="utf-8", errors="ignore") as f:
+            raw = decode_rtf(f.read())
+    except Exception:
+        return NO_STAMPS, None
+    return parse_rtf_text(raw)
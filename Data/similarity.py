@@ -0,0 +1,151 @@
+import hashlib
+import heapq
+import math
+import numpy as np
+from rapidfuzz import process
+from rapidfuzz.distance import Indel
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer
+
+# Pairs scored per rapidfuzz call before checking the threshold again
+PAIR_CHUNK = 4096
+
+
+def select_medoid(values, threshold=0.8, workers=-1):
+    """
+    Picks the bulletin get_final_traffic_text reports for a window: if every
+    pair of values has a Levenshtein ratio >= threshold, the index of the
+    value with the highest similarity sum (first on ties), otherwise the index
+    of the last value. Returns None for an empty list.
+
+    Identical values are scored once, only the upper triangle of the distinct
+    values is computed (Indel.normalized_similarity is Levenshtein.ratio), and
+    scoring stops at the first pair below the threshold.
+    """
+    n = len(values)
+    if n == 0:
+        return None
+
+    unique, inverse = np.unique(np.array(values, dtype=object), return_inverse=True)
+    k = len(unique)
+    # Rows that differ from the first one are checked against the threshold
+    # over all columns, including their own 1.0 on the diagonal
+    if k > 1 and threshold > 1.0:
+        return n - 1
+
+    rows, cols = np.triu_indices(k, 1)
+    pair_scores = np.empty(len(rows), dtype=np.float64)
+    for start in range(0, len(rows), PAIR_CHUNK):
+        stop = start + PAIR_CHUNK
+        scores = process.cpdist(unique[rows[start:stop]], unique[cols[start:stop]],
+                                scorer=Indel.normalized_similarity, dtype=np.float64, workers=workers)
+        if (scores < threshold).any():
+            return n - 1
+        pair_scores[start:stop] = scores
+
+    unique_matrix = np.ones((k, k), dtype=np.float64)
+    unique_matrix[rows, cols] = pair_scores
+    unique_matrix[cols, rows] = pair_scores
+    similarity_matrix = unique_matrix[np.ix_(inverse, inverse)]
+
+    # cumsum adds left to right like sum(row), so ties break exactly as before
+    similarity_sums = np.cumsum(similarity_matrix, axis=1)[:, -1]
+    return int(np.argmax(similarity_sums))
+
+
+def pair_similarities(generated_vectors, real_vectors) -> np.ndarray:
+    """
+    Dot product of row i of generated_vectors with row i of real_vectors, for
+    every i: the diagonal of generated_vectors * real_vectors.T without
+    forming the n x n product. Memory and time are linear in the nonzeros.
+    """
+    if generated_vectors.shape != real_vectors.shape:
+        raise ValueError(f"Shapes differ: {generated_vectors.shape} and {real_vectors.shape}")
+    products = generated_vectors.tocsr().multiply(real_vectors.tocsr())
+    return np.asarray(products.sum(axis=1), dtype=np.float64).ravel()
+
+
+class PairScorer:
+    """
+    Similarity of (generated, real) report pairs over hashed terms.
+
+    The default is the score analyze_reports always used: l2-normalized
+    HashingVectorizer counts, i.e. cosine similarity. With tfidf, terms are
+    weighted by an IDF fitted on fit_texts (the real reports); with
+    cosine=False the vectors are not normalized and scores are raw dot
+    products.
+    """
+
+    def __init__(self, tfidf: bool = False, cosine: bool = True, fit_texts=None):
+        self.tfidf = tfidf
+        self.cosine = cosine
+        norm = 'l2' if cosine else None
+        if tfidf:
+            if fit_texts is None:
+                raise ValueError("tfidf needs fit_texts to fit the IDF weights on")
+            self.vectorizer = HashingVectorizer(stop_words='english', n_features=2 ** 18,
+                                                norm=None, alternate_sign=False)
+            self.transformer = TfidfTransformer(norm=norm).fit(self.vectorizer.transform(fit_texts))
+        else:
+            self.vectorizer = HashingVectorizer(stop_words='english', n_features=2 ** 18, norm=norm)
+            self.transformer = None
+
+    def transform(self, texts):
+        vectors = self.vectorizer.transform(texts)
+        return self.transformer.transform(vectors) if self.transformer is not None else vectors
+
+    def score(self, generated_texts, real_texts) -> np.ndarray:
+        return pair_similarities(self.transform(generated_texts), self.transform(real_texts))
+
+
+def text_key(text: str) -> bytes:
+    """Short digest of a report, to deduplicate on without keeping the text as a key."""
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest()
+
+
+class TopPairs:
+    """
+    The k highest-scoring items offered, at most one per key. Items are
+    offered in order and on equal scores the earlier one wins, so the result
+    is the same as a stable descending sort followed by
+    drop_duplicates(keep='first') and head(k). Holds at most k items.
+    """
+
+    def __init__(self, k: int):
+        if k < 1:
+            raise ValueError(f"k must be at least 1, got {k}")
+        self.k = k
+        self._heap = []  # (score, -order, key, item); the root is the first to be dropped
+        self._by_key = {}
+        self._offered = 0
+
+    def threshold(self) -> float:
+        """Items scoring at or below this cannot get in (-inf until k items are held)."""
+        return self._heap[0][0] if len(self._heap) >= self.k else -math.inf
+
+    def offer(self, score: float, key, item):
+        entry = (score, -self._offered, key, item)
+        self._offered += 1
+
+        held = self._by_key.get(key)
+        if held is not None:
+            if score <= held[0]:
+                return
+            # A better item for a key already held replaces it in place
+            self._heap.remove(held)
+            heapq.heapify(self._heap)
+        elif len(self._heap) >= self.k:
+            if score <= self._heap[0][0]:
+                return
+            dropped = heapq.heapreplace(self._heap, entry)
+            del self._by_key[dropped[2]]
+            self._by_key[key] = entry
+            return
+        heapq.heappush(self._heap, entry)
+        self._by_key[key] = entry
+
+    def __len__(self):
+        return len(self._heap)
+
+    def items(self):
+        """[(score, item)], best first."""
+        return [(score, item) for score, _, _, item in sorted(self._heap, key=lambda e: (-e[0], -e[1]))]
@@ -0,0 +1,126 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, List, Optional, Sequence, Union
+from LLMs.prefixCache import PrefixCache
+
+# Prompts generated together per pipeline call, and how long a batch waits to fill up
+BATCH_SIZE = 8
+MAX_WAIT = 0.05
+
+
+def build_conversations(prompts: Sequence[str], instructions: Union[str, Sequence[str]]) -> List[list]:
+    """One single-turn chat per prompt, with its instructions prepended as in the stateless chat functions."""
+    if isinstance(instructions, str):
+        instructions = [instructions] * len(prompts)
+    if len(instructions) != len(prompts):
+        raise ValueError("Expected one set of instructions per prompt.")
+    return [
+        [{"role": "user", "content": f"{inst}\n\n{prompt}" if inst else prompt}]
+        for prompt, inst in zip(prompts, instructions)
+    ]
+
+
+def shared_instructions(instructions: Union[str, Sequence[str]]) -> str:
+    """The instructions all prompts start with, "" if they differ."""
+    if isinstance(instructions, str):
+        return instructions
+    return instructions[0] if instructions and len(set(instructions)) == 1 else ""
+
+
+def generate_chats(pipe, conversations: List[list], batch_size: int = BATCH_SIZE,
+                   prefix_cache: Optional[PrefixCache] = None, prefix: str = "", **generate_kwargs) -> List[str]:
+    """
+    Runs chat histories through a text-generation pipeline in padded batches
+    and returns the assistant replies in the order of the conversations.
+    Conversations are sorted by length first, so a batch pads as little as possible.
+    With a prefix_cache, conversations that all start with prefix reuse its
+    cached past-key-values instead of prefilling it again (see LLMs.prefixCache).
+    """
+    if prefix_cache is not None:
+        replies = prefix_cache.generate_chats(pipe, conversations, prefix, batch_size, **generate_kwargs)
+        if replies is not None:
+            return replies
+
+    order = sorted(range(len(conversations)), key=lambda i: -sum(len(m["content"]) for m in conversations[i]))
+    outputs = pipe([conversations[i] for i in order], batch_size=batch_size, **generate_kwargs)
+
+    replies = [None] * len(conversations)
+    for i, output in zip(order, outputs):
+        assistant_msg = output[0]["generated_text"][-1]
+        if assistant_msg["role"] != "assistant":
+            raise ValueError("Unexpected response format from model.")
+        replies[i] = assistant_msg["content"]
+    return replies
+
+
+class DynamicBatcher:
+    """
+    Collects chat requests submitted from many threads and generates them
+    together with generate_batch(prompts, instructions). A batch starts once
+    max_batch_size requests are waiting or max_wait seconds after its first
+    request arrived; every caller gets its own reply through the Future
+    returned by submit.
+    """
+
+    def __init__(self, generate_batch: Callable[[List[str], List[str]], List[str]],
+                 max_batch_size: int = BATCH_SIZE, max_wait: float = MAX_WAIT, max_queued: int = 0):
+        self.generate_batch = generate_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.requests = queue.Queue(max_queued)
+        self.processed = 0
+        self.batches = 0
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, prompt: str, instructions: str = "") -> Future:
+        """Queues a request. Raises queue.Full when max_queued requests are already waiting."""
+        future = Future()
+        self.requests.put_nowait((prompt, instructions, future))
+        return future
+
+    def stop(self):
+        self.requests.put(None)
+        self._thread.join()
+
+    def _collect(self):
+        """Blocks for the first request, then takes more until the batch is full or max_wait passed."""
+        first = self.requests.get()
+        if first is None:
+            return None
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self.requests.get(timeout=remaining) if remaining > 0 else self.requests.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                # Stop after this batch
+                self.requests.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                break
+            batch = [item for item in batch if item[2].set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            prompts, instructions, futures = zip(*batch)
+            try:
+                replies = self.generate_batch(list(prompts), list(instructions))
+            except Exception as e:
+                for future in futures:
+                    future.set_exception(e)
+            else:
+                for future, reply in zip(futures, replies):
+                    future.set_result(reply)
+            self.processed += len(batch)
+            self.batches += 1
@@ -2,9 +2,12 @@ import torch
 from transformers import pipeline, AutoTokenizer, BitsAndBytesConfig
 import os
 import time
+from LLMs.batching import BATCH_SIZE, build_conversations, generate_chats, shared_instructions
+from LLMs.prefixCache import PrefixCache
 
 # --- Configuration ---
-model_id = "cjvt/GaMS-9B-Instruct"
+# GAMS_MODEL_ID swaps in another checkpoint, e.g. a tiny local model for testing
+model_id = os.environ.get("GAMS_MODEL_ID", "cjvt/GaMS-9B-Instruct")
 
 use_quantization_if_gpu = True
 
@@ -60,6 +63,10 @@ print(f"Loading tokenizer: {model_id}...")
 try:
     tokenizer = AutoTokenizer.from_pretrained(model_id, trust_remote_code=True)
     eos_token_id = tokenizer.eos_token_id
+    # Batched generation pads prompts; decoder-only models are padded on the left
+    if tokenizer.pad_token is None:
+        tokenizer.pad_token = tokenizer.eos_token
+    tokenizer.padding_side = "left"
     print(f"Tokenizer loaded. EOS token ID: {eos_token_id}")
 except Exception as e:
     print(f"Error loading tokenizer: {e}")
@@ -85,6 +92,9 @@ except Exception as e:
     exit()
 print("-" * 30)
 
+# Past-key-values of instruction prefixes shared between prompts
+prefix_cache = PrefixCache()
+
 # --- Interactive Loop ---
 message_history = [] # Stores the conversation history
 
@@ -204,31 +214,52 @@ def chat_with_gams(prompt, instructions):
     message_history.append({"role": "user", "content": current_message_content})
 
     try:
-        response = pipe(
-            message_history,
+        assistant_response_content = generate_chats(
+            pipe,
+            [message_history],
+            1,
+            prefix_cache=prefix_cache,
+            prefix=instructions,
             max_new_tokens=2048,
             do_sample=True,
             temperature=0.7,
             eos_token_id=eos_token_id,
-        )
-
-        full_generated_output_list = response[0]["generated_text"]
-        new_assistant_message = full_generated_output_list[-1]
-
-        if new_assistant_message["role"] == "assistant":
-            assistant_response_content = new_assistant_message["content"]
-            message_history.append(new_assistant_message)
-            return assistant_response_content
-        else:
-            if message_history and message_history[-1]["role"] == "user":
-                message_history.pop()
-            raise ValueError("Unexpected response format from model.")
+            pad_token_id=tokenizer.pad_token_id,
+        )[0]
+        message_history.append({"role": "assistant", "content": assistant_response_content})
+        return assistant_response_content
 
     except Exception as e:
         if message_history and message_history[-1]["role"] == "user":
             message_history.pop()
         raise e
 
+
+def chat_with_gams_batch(prompts, instructions, batch_size=BATCH_SIZE, **generate_kwargs):
+    """
+    Stateless chat_with_gams for many prompts, generated in padded batches.
+    Args:
+        prompts (list[str]): User input messages.
+        instructions (str | list[str]): Instructions for all prompts, or one per prompt.
+        batch_size (int): Prompts per forward pass.
+        generate_kwargs: Overrides of the generation settings used by chat_with_gams.
+    Returns:
+        list[str]: Assistant responses, in the order of prompts.
+    """
+
+    print(f"Running gams on {len(prompts)} prompts...")
+
+    settings = dict(
+        max_new_tokens=2048,
+        do_sample=True,
+        temperature=0.7,
+        eos_token_id=eos_token_id,
+        pad_token_id=tokenizer.pad_token_id,
+    )
+    settings.update(generate_kwargs)
+    return generate_chats(pipe, build_conversations(prompts, instructions), batch_size, prefix_cache=prefix_cache,
+                          prefix=shared_instructions(instructions), **settings)
+
 print("\n--- Script Finished ---")
 
 
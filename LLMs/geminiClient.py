@@ -0,0 +1,161 @@
+"""
+Stateless Gemini client: every call is an independent generateContent
+request (no chat history is re-sent), so calls cost the same throughout a run
+and can be made from several threads at once. The client has no threads of
+its own; callers bring them (e.g. Pipeline.critic.CriticPipeline), and at
+most max_workers requests run at a time.
+
+Requests go over one pooled HTTP session to the public REST API. Rate limits
+(429) and transient server errors are retried with exponential backoff and
+full jitter, honouring Retry-After, for at most call_timeout seconds per
+call. Every call reports its latency and token usage, and the client keeps
+running totals. GEMINI_API_BASE points the client
+at another server, e.g. a local fake for offline checks.
+"""
+import os
+import random
+import threading
+import time
+from typing import NamedTuple, Optional
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_BASE_URL = "https://generativelanguage.googleapis.com/v1beta"
+MAX_WORKERS = 4
+MAX_RETRIES = 6
+# Seconds one generate() call may take, over all its attempts and backoff
+CALL_TIMEOUT = 300.0
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class GeminiError(RuntimeError):
+    def __init__(self, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+
+
+class GeminiResponse(NamedTuple):
+    text: str
+    latency: float
+    prompt_tokens: int
+    output_tokens: int
+    attempts: int
+
+
+class GeminiClient:
+    def __init__(self, model_name: str, api_key: Optional[str], generation_config: Optional[dict] = None,
+                 max_workers: int = MAX_WORKERS, base_url: Optional[str] = None, max_retries: int = MAX_RETRIES,
+                 backoff: float = 1.0, max_backoff: float = 60.0, timeout: float = 300.0,
+                 call_timeout: float = CALL_TIMEOUT):
+        self.model_name = model_name
+        self.api_key = api_key
+        self.generation_config = dict(generation_config or {})
+        self.base_url = (base_url or os.environ.get("GEMINI_API_BASE", DEFAULT_BASE_URL)).rstrip("/")
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+        self.call_timeout = call_timeout
+
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_workers)
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+        self._slots = threading.BoundedSemaphore(max_workers)
+
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.retries = 0
+        self.prompt_tokens = 0
+        self.output_tokens = 0
+        self.total_latency = 0.0
+
+    def _payload(self, prompt: str) -> dict:
+        # The REST API spells the generation config in camelCase
+        config = {"".join(w.capitalize() if i else w for i, w in enumerate(k.split("_"))): v
+                  for k, v in self.generation_config.items()}
+        return {"contents": [{"role": "user", "parts": [{"text": prompt}]}], "generationConfig": config}
+
+    def _delay(self, attempt: int, retry_after: Optional[str]) -> float:
+        delay = random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+        try:
+            return max(delay, float(retry_after)) if retry_after else delay
+        except ValueError:
+            return delay
+
+    def generate(self, prompt: str) -> GeminiResponse:
+        """
+        One stateless request; at most max_workers run at the same time across
+        threads. Raises GeminiError without an API key, and once call_timeout
+        seconds have passed, counting the wait for a slot, every attempt and
+        the backoff.
+        """
+        if not self.api_key:
+            raise GeminiError("No Gemini API key: set the GOOGLE_API_KEY environment variable.")
+        url = f"{self.base_url}/models/{self.model_name}:generateContent"
+        payload = self._payload(prompt)
+        deadline = time.perf_counter() + self.call_timeout
+
+        if not self._slots.acquire(timeout=self.call_timeout):
+            raise GeminiError(f"No request slot free within {self.call_timeout:.0f} s")
+        # Latency is counted from getting a slot; the deadline includes the wait for it
+        started = time.perf_counter()
+        try:
+            for attempt in range(self.max_retries + 1):
+                retry_after = None
+                remaining = deadline - time.perf_counter()
+                try:
+                    response = self._session.post(url, params={"key": self.api_key}, json=payload,
+                                                  timeout=min(self.timeout, max(remaining, 0.001)))
+                except (requests.ConnectionError, requests.Timeout) as e:
+                    error = GeminiError(f"Request failed: {e}")
+                else:
+                    if response.status_code == 200:
+                        break
+                    error = GeminiError(f"Gemini API returned {response.status_code}: {response.text[:500]}",
+                                        response.status_code)
+                    if response.status_code not in RETRY_STATUSES:
+                        raise error
+                    retry_after = response.headers.get("Retry-After")
+                delay = self._delay(attempt, retry_after)
+                if attempt == self.max_retries or time.perf_counter() + delay >= deadline:
+                    raise error
+                with self._lock:
+                    self.retries += 1
+                time.sleep(delay)
+        finally:
+            self._slots.release()
+
+        body = response.json()
+        candidates = body.get("candidates") or []
+        if not candidates:
+            raise GeminiError(f"No candidates in the response: {body.get('promptFeedback', body)}")
+        text = "".join(part.get("text", "") for part in candidates[0].get("content", {}).get("parts", []))
+        usage = body.get("usageMetadata", {})
+        result = GeminiResponse(
+            text=text.strip(),
+            latency=time.perf_counter() - started,
+            prompt_tokens=usage.get("promptTokenCount", 0),
+            # Includes the thinking tokens of 2.5 models, which are billed as output
+            output_tokens=usage.get("totalTokenCount", 0) - usage.get("promptTokenCount", 0),
+            attempts=attempt + 1,
+        )
+        with self._lock:
+            self.calls += 1
+            self.prompt_tokens += result.prompt_tokens
+            self.output_tokens += result.output_tokens
+            self.total_latency += result.latency
+        return result
+
+    def usage(self) -> dict:
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "retries": self.retries,
+                "prompt_tokens": self.prompt_tokens,
+                "output_tokens": self.output_tokens,
+                "mean_latency": self.total_latency / self.calls if self.calls else 0.0,
+            }
+
+    def close(self):
+        self._session.close()
@@ -1,7 +1,11 @@
+import os
 import torch
 from transformers import pipeline, AutoTokenizer, BitsAndBytesConfig
+from LLMs.batching import BATCH_SIZE, build_conversations, generate_chats, shared_instructions
+from LLMs.prefixCache import PrefixCache
 
-model_id = "google/gemma-7b-it"
+# GEMMA_MODEL_ID swaps in another checkpoint, e.g. a tiny local model for testing
+model_id = os.environ.get("GEMMA_MODEL_ID", "google/gemma-7b-it")
 use_quantization_if_gpu = True
 pipeline_device = -1  # -1 = CPU for HF pipeline
 compute_dtype = None
@@ -55,6 +59,10 @@ try:
         trust_remote_code=True  # Gemma ships its own chat template
     )
     eos_token_id = tokenizer.eos_token_id
+    # Batched generation pads prompts; decoder-only models are padded on the left
+    if tokenizer.pad_token is None:
+        tokenizer.pad_token = tokenizer.eos_token
+    tokenizer.padding_side = "left"
     print(f"Tokenizer loaded. EOS token ID: {eos_token_id}")
 except Exception as e:
     raise RuntimeError(f"Error loading tokenizer: {e}")
@@ -69,7 +77,7 @@ try:
         "text-generation",
         model=model_id,
         tokenizer=tokenizer,
-        device_map={"": 0},
+        device_map={"": 0} if pipeline_device == 0 else None,
         torch_dtype=compute_dtype,
         trust_remote_code=True,
         model_kwargs=model_kwargs,
@@ -79,6 +87,9 @@ except Exception as e:
     raise RuntimeError(f"Error initializing pipeline: {e}")
 print("-" * 30)
 
+# Past-key-values of instruction prefixes shared between prompts
+prefix_cache = PrefixCache()
+
 # --------------------------------------------------
 # Conversation helpers
 # --------------------------------------------------
@@ -138,20 +149,42 @@ def chat_with_gemma_stateless(prompt: str, instructions: str = ""):
     temp_history.append({"role": "user", "content": full_prompt})
 
     try:
-        response = pipe(
-            temp_history,
+        return generate_chats(
+            pipe,
+            [temp_history],
+            1,
+            prefix_cache=prefix_cache,
+            prefix=instructions,
             max_new_tokens=4096,
             do_sample=True,
             temperature=0.7,
             eos_token_id=eos_token_id,
-        )
+            pad_token_id=tokenizer.pad_token_id,
+        )[0]
 
-        assistant_msg = response[0]["generated_text"][-1]
-        if assistant_msg["role"] != "assistant":
-            raise ValueError("Unexpected response format from model.")
+    except Exception as err:
+        raise RuntimeError(f"Inference failed: {err}") from err
 
-        return assistant_msg["content"]
 
+def chat_with_gemma_batch(prompts, instructions="", batch_size: int = BATCH_SIZE, **generate_kwargs):
+    """
+    chat_with_gemma_stateless for many prompts, generated in padded batches of
+    batch_size. instructions is one string for all prompts or one per prompt;
+    generate_kwargs override the generation settings. Replies keep prompt order.
+    """
+    print(f"Running Gemma on {len(prompts)} prompts (stateless)...")
+
+    settings = dict(
+        max_new_tokens=4096,
+        do_sample=True,
+        temperature=0.7,
+        eos_token_id=eos_token_id,
+        pad_token_id=tokenizer.pad_token_id,
+    )
+    settings.update(generate_kwargs)
+    try:
+        return generate_chats(pipe, build_conversations(prompts, instructions), batch_size, prefix_cache=prefix_cache,
+                              prefix=shared_instructions(instructions), **settings)
     except Exception as err:
         raise RuntimeError(f"Inference failed: {err}") from err
 
@@ -0,0 +1,65 @@
+"""
+Thin client for LLMs.modelServer with the same call signatures as the
+in-process chat_with_gams / chat_with_gemma_stateless.
+MODEL_SERVER_URL overrides the default http://127.0.0.1:8765.
+"""
+import json
+import os
+import time
+import urllib.error
+import urllib.request
+from typing import Optional
+from LLMs.modelServer import DEFAULT_HOST, DEFAULT_PORT
+
+DEFAULT_URL = f"http://{DEFAULT_HOST}:{DEFAULT_PORT}"
+
+
+class ModelClient:
+    def __init__(self, url: Optional[str] = None, timeout: float = 3600):
+        self.url = (url or os.environ.get("MODEL_SERVER_URL", DEFAULT_URL)).rstrip("/")
+        self.timeout = timeout
+
+    def _request(self, path: str, payload: Optional[dict] = None, timeout: Optional[float] = None):
+        """Returns (HTTP status, decoded JSON body). Connection errors are raised as URLError."""
+        data = None if payload is None else json.dumps(payload).encode('utf-8')
+        request = urllib.request.Request(self.url + path, data=data, headers={"Content-Type": "application/json"})
+        try:
+            with urllib.request.urlopen(request, timeout=timeout or self.timeout) as response:
+                return response.status, json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            return e.code, json.loads(e.read() or b"{}")
+
+    def health(self) -> Optional[dict]:
+        """The server's worker status, or None if no server is listening."""
+        try:
+            return self._request("/health", timeout=2)[1]
+        except (urllib.error.URLError, OSError, ValueError):
+            return None
+
+    def is_ready(self, model_name: Optional[str] = None) -> bool:
+        """True if a server is up with its model loaded (and it is model_name, when given)."""
+        status = self.health()
+        return bool(status and status.get("ready") and model_name in (None, status.get("model")))
+
+    def wait_until_ready(self, timeout: float = 1800, model_name: Optional[str] = None) -> bool:
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            if self.is_ready(model_name):
+                return True
+            status = self.health()
+            if status and status.get("error"):
+                raise RuntimeError(status["error"])
+            time.sleep(1)
+        return False
+
+    def chat(self, model_name: str, prompt: str, instructions: str = "") -> str:
+        code, body = self._request("/chat", {"model": model_name, "prompt": prompt, "instructions": instructions})
+        if code != 200:
+            raise RuntimeError(f"Model server returned {code}: {body.get('error', body)}")
+        return body["response"]
+
+    def chat_with_gams(self, prompt: str, instructions: str) -> str:
+        return self.chat("gams", prompt, instructions)
+
+    def chat_with_gemma_stateless(self, prompt: str, instructions: str = "") -> str:
+        return self.chat("gemma", prompt, instructions)
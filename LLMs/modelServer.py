@@ -0,0 +1,183 @@
+"""
+Keeps GaMS or Gemma loaded in one long-lived process and serves
+chat_with_gams / chat_with_gemma_stateless over local HTTP, so runs of
+main.py do not reload the weights every time.
+
+Start it from the project root and leave it running:
+    python -m LLMs.modelServer gams [--host 127.0.0.1] [--port 8765] [--batch-size 8] [--max-wait 0.05]
+
+GAMS_MODEL_ID / GEMMA_MODEL_ID point the server at a different (e.g. tiny
+local) checkpoint. Endpoints:
+    GET  /health  200 while the process is up, with the worker status
+    GET  /ready   200 once the model is loaded, 503 before (or if loading failed)
+    POST /chat    {"model", "prompt", "instructions"} -> {"response", "seconds"}
+"""
+import argparse
+import importlib
+import json
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from LLMs.batching import BATCH_SIZE, MAX_WAIT, DynamicBatcher
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+MAX_QUEUED_REQUESTS = 64
+
+# Model name -> (module, batched function); each prompt gets the same
+# stateless single-turn chat as chat_with_gams / chat_with_gemma_stateless
+MODELS = {
+    "gams": ("LLMs.gaMS", "chat_with_gams_batch"),
+    "gemma": ("LLMs.gemma", "chat_with_gemma_batch"),
+}
+
+
+class ModelWorker:
+    """
+    Loads the model on a background thread and then generates queued chat
+    requests in dynamic batches (see LLMs.batching.DynamicBatcher), so the
+    pipeline is only ever called from one thread.
+    """
+
+    def __init__(self, model_name: str, batch_size: int = BATCH_SIZE, max_wait: float = MAX_WAIT,
+                 max_queued: int = MAX_QUEUED_REQUESTS):
+        if model_name not in MODELS:
+            raise ValueError(f"Unknown model '{model_name}', expected one of {sorted(MODELS)}.")
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+        self.max_queued = max_queued
+        self.ready = threading.Event()
+        self.error = None
+        self.batcher = None
+        self._thread = threading.Thread(target=self._load, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._thread.join()
+        if self.batcher is not None:
+            self.batcher.stop()
+
+    def _load(self):
+        module_name, function_name = MODELS[self.model_name]
+        started = time.time()
+        try:
+            chat_batch = getattr(importlib.import_module(module_name), function_name)
+        except (Exception, SystemExit) as e:
+            # gaMS.py calls exit() when the tokenizer or pipeline cannot be loaded
+            self.error = f"Loading {module_name} failed: {e!r}"
+            print(self.error)
+            return
+        self.batcher = DynamicBatcher(
+            lambda prompts, instructions: chat_batch(prompts, instructions, batch_size=self.batch_size),
+            max_batch_size=self.batch_size, max_wait=self.max_wait, max_queued=self.max_queued,
+        )
+        print(f"{self.model_name} loaded in {time.time() - started:.1f} seconds, ready for requests.")
+        self.ready.set()
+
+    def submit(self, prompt: str, instructions: str) -> Future:
+        """Queues a chat request. Raises queue.Full when max_queued requests are already waiting."""
+        return self.batcher.submit(prompt, instructions)
+
+    def status(self) -> dict:
+        return {
+            "model": self.model_name,
+            "ready": self.ready.is_set(),
+            "error": self.error,
+            "queued": self.batcher.requests.qsize() if self.batcher else 0,
+            "processed": self.batcher.processed if self.batcher else 0,
+            "batches": self.batcher.batches if self.batcher else 0,
+        }
+
+
+class ModelRequestHandler(BaseHTTPRequestHandler):
+    worker: ModelWorker = None
+
+    def _reply(self, code: int, payload: dict):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._reply(200, {"status": "ok", **self.worker.status()})
+        elif self.path == "/ready":
+            self._reply(200 if self.worker.ready.is_set() else 503, self.worker.status())
+        else:
+            self._reply(404, {"error": f"Unknown path {self.path}"})
+
+    def do_POST(self):
+        if self.path != "/chat":
+            self._reply(404, {"error": f"Unknown path {self.path}"})
+            return
+        try:
+            request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            prompt, instructions = request["prompt"], request.get("instructions", "")
+        except (ValueError, KeyError, TypeError) as e:
+            self._reply(400, {"error": f"Invalid request: {e!r}"})
+            return
+        if request.get("model", self.worker.model_name) != self.worker.model_name:
+            self._reply(400, {"error": f"This server runs {self.worker.model_name}, not {request['model']}."})
+            return
+        if not self.worker.ready.is_set():
+            self._reply(503, self.worker.status())
+            return
+
+        started = time.time()
+        try:
+            future = self.worker.submit(prompt, instructions)
+        except queue.Full:
+            self._reply(429, {"error": "Too many queued requests, try again later."})
+            return
+        try:
+            response = future.result()
+        except Exception as e:
+            self._reply(500, {"error": f"Inference failed: {e}"})
+            return
+        self._reply(200, {"response": response, "seconds": time.time() - started})
+
+    def log_message(self, format, *args):
+        # Requests are logged by the chat functions themselves
+        pass
+
+
+def serve(model_name: str, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT,
+          batch_size: int = BATCH_SIZE, max_wait: float = MAX_WAIT) -> ThreadingHTTPServer:
+    """Starts loading the model and returns the (not yet serving) HTTP server bound to host:port."""
+    worker = ModelWorker(model_name, batch_size, max_wait)
+    handler = type("Handler", (ModelRequestHandler,), {"worker": worker})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.worker = worker
+    worker.start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve GaMS or Gemma from a resident process.")
+    parser.add_argument("model", choices=sorted(MODELS))
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="Requests generated together")
+    parser.add_argument("--max-wait", type=float, default=MAX_WAIT,
+                        help="Seconds a batch waits for more requests after the first one")
+    args = parser.parse_args()
+
+    server = serve(args.model, args.host, args.port, args.batch_size, args.max_wait)
+    print(f"Model server for {args.model} listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nShutting down model server.")
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
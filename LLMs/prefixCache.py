@@ -0,0 +1,176 @@
+"""
+Reuse of the attention key/value cache for prompt prefixes shared between
+generations. Every stateless prompt starts with the rank's instructions
+(several kilobytes, identical for all ranks at iteration 1); their
+past-key-values are computed once and later prompts with the same prefix
+only prefill the rest.
+
+Entries are keyed by a hash of the prefix token ids and kept in memory,
+evicting the least recently used ones when their tensors grow past
+max_bytes. PREFIX_CACHE_BYTES=0 turns the cache off.
+
+A batch goes through the cache only if all its prompts start with the same
+prefix. The prompts are laid out as [prefix, padding, rest] instead of being
+padded on the left, so the cached prefix sits at the same positions in
+every row; the padding is masked out and the position ids follow the
+attention mask, as in the left-padded pipeline batches.
+
+Only models that generate with a DynamicCache are supported. Models whose
+generation config asks for another cache (e.g. Gemma2 and so GaMS-9B, which
+use a sliding-window "hybrid" cache) go through the pipeline as before.
+"""
+import copy
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import List, Optional
+import numpy as np
+import torch
+from transformers import DynamicCache
+
+MAX_CACHE_BYTES = int(os.environ.get("PREFIX_CACHE_BYTES", 1 * 2 ** 30))
+# Shorter prefixes are cheaper to prefill again than to copy
+MIN_PREFIX_TOKENS = 32
+
+
+def prefix_key(token_ids) -> str:
+    return hashlib.sha1(np.asarray(token_ids, dtype=np.int64).tobytes()).hexdigest()
+
+
+def cache_nbytes(kv: DynamicCache) -> int:
+    return sum(t.numel() * t.element_size() for t in (*kv.key_cache, *kv.value_cache))
+
+
+def supports_prefix_cache(model) -> bool:
+    """Whether model generates with a DynamicCache, which a cached prefix can be passed as."""
+    return (getattr(model, "_supports_cache_class", False)
+            and getattr(model.generation_config, "cache_implementation", None) is None)
+
+
+def prefix_token_count(tokenizer, text: str, prefix: str) -> int:
+    """
+    Tokens of text (tokenized as apply_chat_template does) that lie entirely
+    within text up to the end of the first occurrence of prefix; 0 if prefix
+    is not in text or the tokenizer gives no offsets.
+    """
+    start = text.find(prefix)
+    if start < 0:
+        return 0
+    end = start + len(prefix)
+    try:
+        offsets = tokenizer(text, add_special_tokens=False, return_offsets_mapping=True)["offset_mapping"]
+    except NotImplementedError:
+        # Slow tokenizers have no offsets
+        return 0
+    count = 0
+    while count < len(offsets) and offsets[count][1] <= end:
+        count += 1
+    return count
+
+
+class PrefixCache:
+    """
+    In-memory LRU of prefix token ids -> DynamicCache of the prefix. Safe to
+    share between threads; hits and misses are counted per instance.
+    """
+
+    def __init__(self, max_bytes: int = MAX_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[DynamicCache]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: str, kv: DynamicCache):
+        nbytes = cache_nbytes(kv)
+        if nbytes > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (kv, nbytes)
+            self._bytes += nbytes
+            while self._bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._bytes, "hits": self.hits, "misses": self.misses}
+
+    def prefill(self, model, prefix_ids: List[int]) -> DynamicCache:
+        """The cached past-key-values of prefix_ids, computed and stored on a miss."""
+        key = prefix_key(prefix_ids)
+        kv = self.get(key)
+        if kv is None:
+            with torch.no_grad():
+                kv = model(torch.tensor([prefix_ids], device=model.device),
+                           past_key_values=DynamicCache(), use_cache=True).past_key_values
+            self.put(key, kv)
+        return kv
+
+    def generate_chats(self, pipe, conversations: List[list], prefix: str, batch_size: int,
+                       **generate_kwargs) -> Optional[List[str]]:
+        """
+        generate_chats over the cached past-key-values of prefix, which every
+        conversation must start with. Returns None, without generating
+        anything, if the cache is off, the model needs another kind of cache
+        (see supports_prefix_cache) or the conversations do not share at
+        least MIN_PREFIX_TOKENS tokens of prefix.
+        """
+        tokenizer, model = pipe.tokenizer, pipe.model
+        if self.max_bytes <= 0 or not prefix or not supports_prefix_cache(model):
+            return None
+        texts = [tokenizer.apply_chat_template(c, add_generation_prompt=True, tokenize=False) for c in conversations]
+        length = prefix_token_count(tokenizer, texts[0], prefix)
+        encoded = [tokenizer(text, add_special_tokens=False)["input_ids"] for text in texts]
+        prefix_ids = encoded[0][:length]
+        # At least one token of each prompt is left to run through the model
+        if length < MIN_PREFIX_TOKENS or any(len(ids) <= length or ids[:length] != prefix_ids for ids in encoded):
+            return None
+
+        kv = self.prefill(model, prefix_ids)
+        pad_id = tokenizer.pad_token_id
+        order = sorted(range(len(conversations)), key=lambda i: -len(encoded[i]))
+        replies = [None] * len(conversations)
+        for start in range(0, len(order), batch_size):
+            rows = order[start:start + batch_size]
+            width = max(len(encoded[i]) for i in rows) - length
+            input_ids, attention_mask = [], []
+            for i in rows:
+                rest = encoded[i][length:]
+                input_ids.append(prefix_ids + [pad_id] * (width - len(rest)) + rest)
+                attention_mask.append([1] * length + [0] * (width - len(rest)) + [1] * len(rest))
+
+            past = copy.deepcopy(kv)
+            past.batch_repeat_interleave(len(rows))
+            with torch.no_grad():
+                output = model.generate(
+                    input_ids=torch.tensor(input_ids, device=model.device),
+                    attention_mask=torch.tensor(attention_mask, device=model.device),
+                    past_key_values=past,
+                    **generate_kwargs,
+                )
+            # Decoded as the pipeline does: the full text minus the decoded prompt
+            for row, i in enumerate(rows):
+                sequence = encoded[i] + output[row, length + width:].tolist()
+                prompt_text = tokenizer.decode(encoded[i], skip_special_tokens=True)
+                replies[i] = tokenizer.decode(sequence, skip_special_tokens=True)[len(prompt_text):]
+        return replies
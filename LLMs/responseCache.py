@@ -0,0 +1,128 @@
+"""
+Persistent cache of LLM responses (the Gemini critic), so re-running an
+experiment with the same prompts replays the stored answers instead of
+calling the API again.
+
+Entries live in one SQLite file, keyed by a hash of the model name, the
+generation config and the fully rendered prompt. When the stored responses
+grow past max_bytes, the least recently used entries are evicted.
+
+Usage: python -m LLMs.responseCache status|clear
+"""
+import argparse
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Optional
+
+cache_path = Path("./Data/cache/gemini_responses.sqlite")
+MAX_CACHE_BYTES = 256 * 2 ** 20
+
+
+def make_key(model_name: str, generation_config: dict, prompt: str) -> str:
+    payload = json.dumps([model_name, generation_config, prompt], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+    """
+    SQLite-backed LRU of prompt -> response. Safe to share between the
+    critic threads; hits and misses are counted per instance.
+    """
+
+    def __init__(self, path=cache_path, max_bytes: int = MAX_CACHE_BYTES):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, response TEXT NOT NULL, size INTEGER NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+        self._db.commit()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._db.execute("SELECT response FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._db.execute("UPDATE responses SET last_used = ? WHERE key = ?", (time.time(), key))
+            self._db.commit()
+            return row[0]
+
+    def put(self, key: str, response: str):
+        size = len(response.encode('utf-8'))
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, response, size, last_used) VALUES (?, ?, ?, ?)",
+                (key, response, size, time.time()),
+            )
+            self._evict()
+            self._db.commit()
+
+    def _evict(self):
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        evicted = []
+        for key, size in self._db.execute("SELECT key, size FROM responses ORDER BY last_used"):
+            if total <= self.max_bytes:
+                break
+            evicted.append((key,))
+            total -= size
+        self._db.executemany("DELETE FROM responses WHERE key = ?", evicted)
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries, size = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        return {"entries": entries, "bytes": size, "hits": self.hits, "misses": self.misses}
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM responses")
+            self._db.commit()
+
+    def close(self):
+        self._db.close()
+
+
+def cached_generate(cache: Optional[ResponseCache], backend: Callable[[str], str], model_name: str,
+                    generation_config: dict, prompt: str, bypass: bool = False) -> str:
+    """
+    backend(prompt) through the cache. With bypass (or no cache) the backend
+    is always called, and its fresh response still replaces the stored one.
+    Exceptions from the backend are not cached.
+    """
+    key = make_key(model_name, generation_config, prompt)
+    if cache is not None and not bypass:
+        response = cache.get(key)
+        if response is not None:
+            return response
+    response = backend(prompt)
+    if cache is not None:
+        cache.put(key, response)
+    return response
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect the Gemini response cache.")
+    parser.add_argument("command", choices=["status", "clear"])
+    parser.add_argument("--path", default=str(cache_path))
+    args = parser.parse_args()
+
+    cache = ResponseCache(args.path)
+    if args.command == "status":
+        stats = cache.stats()
+        print(f"{args.path}: {stats['entries']} responses, {stats['bytes'] / 2 ** 20:.1f} MiB")
+    else:
+        cache.clear()
+        print(f"Cleared '{args.path}'")
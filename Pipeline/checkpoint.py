@@ -0,0 +1,90 @@
+"""
+Checkpoints of run_automated_improvement, so an interrupted run can be
+continued with `python main.py --resume <run-id>`.
+
+    Logs/runs/<run-id>/run.json            settings of the run (model, ranks, iterations, log file)
+    Logs/runs/<run-id>/checkpoints.jsonl   one record per finished iteration, and one per
+                                           rank whose log was written to the detailed log
+
+Records are appended and flushed to disk as soon as they happen. A line cut
+short by a crash is ignored when the checkpoints are read back.
+"""
+import json
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+
+runs_dir = Path("./Logs/runs")
+
+
+def new_run_id(model_name: str) -> str:
+    return f"{model_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+
+
+class RunCheckpoint:
+    def __init__(self, run_id: str, settings: dict):
+        self.run_id = run_id
+        self.settings = settings
+        self.path = runs_dir / run_id / "checkpoints.jsonl"
+        self._lock = threading.Lock()
+
+    @classmethod
+    def create(cls, run_id: str, settings: dict) -> "RunCheckpoint":
+        run_dir = runs_dir / run_id
+        run_dir.mkdir(parents=True, exist_ok=False)
+        with open(run_dir / "run.json", 'w', encoding='utf-8') as f:
+            json.dump(settings, f, ensure_ascii=False, indent=2)
+        return cls(run_id, settings)
+
+    @classmethod
+    def open(cls, run_id: str) -> "RunCheckpoint":
+        settings_path = runs_dir / run_id / "run.json"
+        if not settings_path.is_file():
+            raise FileNotFoundError(f"No checkpoints for run '{run_id}' in '{runs_dir}'.")
+        with open(settings_path, 'r', encoding='utf-8') as f:
+            return cls(run_id, json.load(f))
+
+    def _append(self, record: dict):
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+
+    def record_iteration(self, rank: int, iteration: int, **fields):
+        self._append({"type": "iteration", "rank": rank, "iteration": iteration, **fields})
+
+    def mark_written(self, rank: int, complete: bool):
+        """The rank's log is in the detailed log; complete is False if the rank stopped with an error."""
+        self._append({"type": "rank_written", "rank": rank, "complete": complete})
+
+    def records(self):
+        if not self.path.is_file():
+            return
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+    def progress(self):
+        """
+        Returns ({rank: [iteration records 1..n]}, {ranks whose complete log was written}).
+        Only the unbroken run of iterations from 1 counts for each rank.
+        """
+        iterations, written = {}, set()
+        for record in self.records():
+            if record["type"] == "iteration":
+                iterations.setdefault(record["rank"], {})[record["iteration"]] = record
+            elif record["type"] == "rank_written" and record["complete"]:
+                written.add(record["rank"])
+
+        done = {}
+        for rank, by_iteration in iterations.items():
+            done[rank] = []
+            while len(done[rank]) + 1 in by_iteration:
+                done[rank].append(by_iteration[len(done[rank]) + 1])
+        return done, written
@@ -0,0 +1,50 @@
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError
+from typing import Callable, Optional
+from LLMs.geminiClient import CALL_TIMEOUT
+
+# Critic (Gemini) requests outstanding at once, and seconds to wait for one. The
+# wait outlasts the client's own call_timeout by CRITIC_GRACE, so the client gives
+# up first and a request the critic stops waiting for frees its slots right after.
+MAX_IN_FLIGHT = 4
+CRITIC_GRACE = 30
+CRITIC_TIMEOUT = CALL_TIMEOUT + CRITIC_GRACE
+
+
+class CriticPipeline:
+    """
+    Sends critic requests (chat_with_gemini) from a small thread pool so the
+    caller decides when to wait for them. At most max_in_flight requests are
+    outstanding; submit blocks while the window is full. result() waits at
+    most timeout seconds, after which the request is cancelled if it has not
+    started and abandoned otherwise. close() cancels everything still queued.
+    """
+
+    def __init__(self, critic: Callable[..., str], max_in_flight: int = MAX_IN_FLIGHT,
+                 timeout: Optional[float] = CRITIC_TIMEOUT):
+        self.critic = critic
+        self.timeout = timeout
+        self._window = threading.BoundedSemaphore(max_in_flight)
+        self._executor = ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="critic")
+
+    def submit(self, *args) -> Future:
+        """Starts critic(*args) in the background and returns its Future."""
+        self._window.acquire()
+        try:
+            future = self._executor.submit(self.critic, *args)
+        except BaseException:
+            self._window.release()
+            raise
+        future.add_done_callback(lambda _: self._window.release())
+        return future
+
+    def result(self, future: Future, timeout: Optional[float] = None) -> str:
+        """The critic's response. Raises concurrent.futures.TimeoutError after timeout (default self.timeout)."""
+        try:
+            return future.result(self.timeout if timeout is None else timeout)
+        except TimeoutError:
+            future.cancel()
+            raise
+
+    def close(self, cancel_pending: bool = False):
+        self._executor.shutdown(wait=not cancel_pending, cancel_futures=cancel_pending)
@@ -0,0 +1,182 @@
+"""
+Typed per-iteration results of run_automated_improvement, one JSONL file per
+run under Logs/results/, so scores can be compared across runs without
+parsing the detailed text logs.
+
+Every line follows SCHEMA (SCHEMA_VERSION is stored with each record).
+Records are buffered and written with one fsync per batch.
+
+Usage: python -m Pipeline.results [run_id ...]   mean scores per run and iteration
+"""
+import argparse
+import json
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Iterable, Optional
+import pandas as pd
+
+results_dir = Path("./Logs/results")
+
+SCHEMA_VERSION = 1
+
+# Gemini rating categories -> column names
+RATING_COLUMNS = {
+    "Slovnica": "rating_grammar",
+    "Hierarhija dogodkov": "rating_hierarchy",
+    "Sestava prometne informacije": "rating_structure",
+    "Poimenovanje avtocest": "rating_road_names",
+    "Generalna": "rating_overall",
+}
+
+SCHEMA = {
+    "schema_version": "int64",
+    "run_id": "string",
+    "model": "string",
+    "rank": "int64",
+    "iteration": "int64",
+    "timestamp": "datetime64[ns]",
+    "finished_at": "datetime64[ns]",
+    "duration": "float64",
+    "generate_seconds": "float64",
+    "score_seconds": "float64",
+    "critique_seconds": "float64",
+    "bleu": "float64",
+    "bert_precision": "float64",
+    "bert_recall": "float64",
+    "bert_f1": "float64",
+    **{column: "Int64" for column in RATING_COLUMNS.values()},
+}
+
+rating_rx = re.compile(r"^\s*(\d+)")
+
+
+def rating_score(rating: Optional[str]) -> Optional[int]:
+    """The score from a parsed Gemini rating such as '4 - utemeljitev', None if missing."""
+    match = rating_rx.match(rating or "")
+    return int(match.group(1)) if match else None
+
+
+def result_record(run_id: str, model: str, rank: int, iteration: int, fields: dict) -> dict:
+    """A results record from the fields of an iteration checkpoint (see Pipeline.checkpoint)."""
+    scores, ratings, stages = fields["scores"], fields["gemini_ratings"], fields["stage_times"]
+    return {
+        "schema_version": SCHEMA_VERSION,
+        "run_id": run_id,
+        "model": model,
+        "rank": rank,
+        "iteration": iteration,
+        "timestamp": fields["timestamp"],
+        "finished_at": fields["finished_at"],
+        "duration": fields["duration"],
+        "generate_seconds": stages.get("generate"),
+        "score_seconds": stages.get("score"),
+        "critique_seconds": stages.get("critique"),
+        "bleu": scores["bleu"],
+        "bert_precision": scores["bert_precision"],
+        "bert_recall": scores["bert_recall"],
+        "bert_f1": scores["bert_f1"],
+        **{column: rating_score(ratings.get(category)) for category, column in RATING_COLUMNS.items()},
+    }
+
+
+class ResultsWriter:
+    """
+    Appends records to Logs/results/<run_id>.jsonl. Records are buffered and
+    written (and fsynced) together once flush_every are waiting or
+    flush_interval seconds passed since the last write, and on close().
+    Records appended after close(), e.g. by a final critique that finished
+    late, are written right away.
+    """
+
+    def __init__(self, run_id: str, flush_every: int = 20, flush_interval: float = 30.0):
+        self.path = results_dir / f"{run_id}.jsonl"
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self._buffer = []
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        self._closed = False
+        results_dir.mkdir(parents=True, exist_ok=True)
+
+    def written_keys(self) -> set:
+        """(rank, iteration) of the records already in the file."""
+        if not self.path.is_file():
+            return set()
+        keys = set()
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                keys.add((record["rank"], record["iteration"]))
+        return keys
+
+    def append(self, record: dict):
+        with self._lock:
+            self._buffer.append(json.dumps(record, ensure_ascii=False) + "\n")
+            if (self._closed or len(self._buffer) >= self.flush_every
+                    or time.monotonic() - self._last_flush >= self.flush_interval):
+                self._flush()
+
+    def _flush(self):
+        if self._buffer:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.writelines(self._buffer)
+                f.flush()
+                os.fsync(f.fileno())
+            self._buffer.clear()
+        self._last_flush = time.monotonic()
+
+    def flush(self):
+        with self._lock:
+            self._flush()
+
+    def close(self):
+        with self._lock:
+            self._flush()
+            self._closed = True
+
+
+def load_results(run_ids: Optional[Iterable[str]] = None, model: Optional[str] = None) -> pd.DataFrame:
+    """
+    All results (or those of run_ids / model) as one DataFrame with the SCHEMA
+    dtypes. A record written twice for the same iteration keeps its last copy.
+    """
+    paths = sorted(results_dir.glob("*.jsonl")) if run_ids is None else [results_dir / f"{r}.jsonl" for r in run_ids]
+    records = []
+    for path in paths:
+        if not path.is_file():
+            continue
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    continue
+
+    df = pd.DataFrame(records, columns=list(SCHEMA))
+    if model is not None:
+        df = df[df["model"] == model]
+    df = df.drop_duplicates(["run_id", "rank", "iteration"], keep="last")
+    for column, dtype in SCHEMA.items():
+        df[column] = pd.to_datetime(df[column]) if dtype.startswith("datetime") else df[column].astype(dtype)
+    return df.sort_values(["run_id", "rank", "iteration"]).reset_index(drop=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the results of improvement runs.")
+    parser.add_argument("run_ids", nargs="*", help="runs to load (all runs if none are given)")
+    parser.add_argument("--model")
+    args = parser.parse_args()
+
+    df = load_results(args.run_ids or None, args.model)
+    if df.empty:
+        print(f"No results found in '{results_dir}'.")
+    else:
+        columns = ["bleu", "bert_f1", "rating_overall", "duration"]
+        with pd.option_context("display.width", 200, "display.max_rows", 200):
+            print(df.groupby(["run_id", "iteration"])[columns].mean().round(4))
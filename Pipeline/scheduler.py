@@ -0,0 +1,76 @@
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Optional
+
+# How many ranks may be inside each stage at the same time. Generation is
+# batched across ranks by the model server / DynamicBatcher and the scorers
+# share one model and caches. Gemini calls are bounded by Pipeline.critic.
+STAGE_LIMITS = {"generate": 10, "score": 1}
+
+
+class RankScheduler:
+    """
+    Runs every rank's improvement pipeline (generate -> score -> critique ->
+    next iteration) on its own thread, so the ranks overlap: one rank is being
+    scored while others wait on the model or on Gemini. A pipeline enters a
+    stage with `with scheduler.stage(name):`, which blocks while that stage is
+    at its concurrency limit.
+    """
+
+    def __init__(self, stage_limits: Optional[Dict[str, int]] = None, max_parallel_ranks: Optional[int] = None):
+        limits = dict(STAGE_LIMITS, **(stage_limits or {}))
+        self._semaphores = {name: threading.BoundedSemaphore(limit) for name, limit in limits.items()}
+        self.max_parallel_ranks = max_parallel_ranks
+        # Seconds spent inside / waiting for each stage, summed over ranks
+        self.stage_seconds = defaultdict(float)
+        self.wait_seconds = defaultdict(float)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name: str):
+        requested = time.perf_counter()
+        with self._semaphores[name]:
+            entered = time.perf_counter()
+            try:
+                yield
+            finally:
+                with self._lock:
+                    self.wait_seconds[name] += entered - requested
+                    self.stage_seconds[name] += time.perf_counter() - entered
+
+    def run(self, ranks: Iterable[int], pipeline: Callable[[int], object],
+            on_done: Optional[Callable[[int, object, Optional[BaseException]], None]] = None) -> dict:
+        """
+        Calls pipeline(rank) for all ranks concurrently. on_done(rank, result,
+        error) is called from this thread in rank order, as soon as a rank and
+        every rank before it have finished, so whatever it writes comes out in
+        the same order on every run. A failing rank does not stop the others.
+        Returns {rank: result} for the ranks that finished without an error.
+        """
+        ranks = list(ranks)
+        finished, results = {}, {}
+        next_index = 0
+        with ThreadPoolExecutor(max_workers=self.max_parallel_ranks or max(1, len(ranks))) as executor:
+            futures = {executor.submit(pipeline, rank): rank for rank in ranks}
+            for future in as_completed(futures):
+                finished[futures[future]] = future
+                while next_index < len(ranks) and ranks[next_index] in finished:
+                    rank = ranks[next_index]
+                    error = finished[rank].exception()
+                    result = None if error else finished[rank].result()
+                    if error is None:
+                        results[rank] = result
+                    if on_done is not None:
+                        on_done(rank, result, error)
+                    next_index += 1
+        return results
+
+    def summary(self) -> str:
+        """Time spent in and waiting for every stage, summed over all ranks."""
+        return "\n".join(
+            f"  {name:<9} busy {self.stage_seconds[name]:8.1f} s, waiting {self.wait_seconds[name]:8.1f} s"
+            for name in self._semaphores
+        )
@@ -1,19 +1,105 @@
-from bert_score import score as bert_scorer
-from typing import Tuple
+from bert_score.utils import get_bert_embedding, get_model, get_tokenizer, greedy_cos_idf, model2layers, sent_encode
+from collections import OrderedDict, defaultdict
+from torch.nn.utils.rnn import pad_sequence
+from typing import List, Optional, Tuple
+import torch
 
 BERT_MODEL_TYPE = 'bert-base-uncased'
 
 
+class BertScorer:
+    """
+    Keeps a BERTScore model and tokenizer resident and scores lists of
+    candidate/reference pairs in padded batches of similar-length sentences.
+    Reference embeddings are cached (LRU), since a rank's reference is scored
+    again in every iteration. Same setup as bert_score.score without idf or
+    rescaling, e.g. BertScorer('bert-base-multilingual-cased') for Slovene.
+    """
+
+    def __init__(self, model_type: str = BERT_MODEL_TYPE, num_layers: Optional[int] = None,
+                 batch_size: int = 64, device: Optional[str] = None, max_cached_references: int = 1024):
+        if num_layers is None:
+            num_layers = model2layers[model_type]
+        if device is None:
+            device = "cuda" if torch.cuda.is_available() else "cpu"
+
+        self.model_type = model_type
+        self.batch_size = batch_size
+        self.device = device
+        self.max_cached_references = max_cached_references
+        self.tokenizer = get_tokenizer(model_type, False)
+        self.model = get_model(model_type, num_layers, False)
+        self.model.to(device)
+
+        self.idf_dict = defaultdict(lambda: 1.0)
+        # set idf for [SEP] and [CLS] to 0
+        self.idf_dict[self.tokenizer.sep_token_id] = 0
+        self.idf_dict[self.tokenizer.cls_token_id] = 0
+
+        self._references = OrderedDict()
+
+    def _embed(self, sentences) -> dict:
+        """Returns {sentence: (embedding, idf)} for the unique sentences, batched by token length."""
+        unique = sorted(set(sentences), key=lambda s: len(sent_encode(self.tokenizer, s)), reverse=True)
+        stats = {}
+        for start in range(0, len(unique), self.batch_size):
+            batch = unique[start:start + self.batch_size]
+            embs, masks, padded_idf = get_bert_embedding(
+                batch, self.model, self.tokenizer, self.idf_dict, device=self.device
+            )
+            embs, masks, padded_idf = embs.cpu(), masks.cpu(), padded_idf.cpu()
+            for i, sen in enumerate(batch):
+                sequence_len = masks[i].sum().item()
+                stats[sen] = (embs[i, :sequence_len], padded_idf[i, :sequence_len])
+        return stats
+
+    def _reference_stats(self, references) -> dict:
+        missing = [r for r in set(references) if r not in self._references]
+        self._references.update(self._embed(missing))
+        stats = {}
+        for ref in references:
+            self._references.move_to_end(ref)
+            stats[ref] = self._references[ref]
+        while len(self._references) > self.max_cached_references:
+            self._references.popitem(last=False)
+        return stats
+
+    def _pad(self, sen_batch, stats):
+        emb, idf = zip(*(stats[s] for s in sen_batch))
+        emb_pad = pad_sequence([e.to(self.device) for e in emb], batch_first=True, padding_value=2.0)
+        idf_pad = pad_sequence([i.to(self.device) for i in idf], batch_first=True)
+        lens = torch.tensor([e.size(0) for e in emb], dtype=torch.long)
+        mask = torch.arange(emb_pad.size(1), dtype=torch.long).expand(len(lens), -1) < lens.unsqueeze(1)
+        return emb_pad, mask.to(self.device), idf_pad
+
+    def score(self, candidates: List[str], references: List[str]) -> List[Tuple[float, float, float]]:
+        """Returns (precision, recall, f1) for every candidate/reference pair."""
+        if len(candidates) != len(references):
+            raise ValueError("Different number of candidates and references.")
+
+        ref_stats = self._reference_stats(references)
+        hyp_stats = self._embed(candidates)
+
+        results = []
+        with torch.no_grad():
+            for start in range(0, len(candidates), self.batch_size):
+                batch_refs = references[start:start + self.batch_size]
+                batch_hyps = candidates[start:start + self.batch_size]
+                P, R, F1 = greedy_cos_idf(*self._pad(batch_refs, ref_stats), *self._pad(batch_hyps, hyp_stats))
+                results.extend(zip(P.cpu().tolist(), R.cpu().tolist(), F1.cpu().tolist()))
+        return results
+
+
+_default_scorer = None
+
+
+def get_default_scorer() -> BertScorer:
+    """The BertScorer used by calculate_bert, loaded on first use."""
+    global _default_scorer
+    if _default_scorer is None:
+        _default_scorer = BertScorer()
+    return _default_scorer
+
+
 def calculate_bert(generated_report: str, optimal_report: str) -> Tuple[float, float, float]:
-    candidates = [generated_report]
-    references = [optimal_report]
-
-    precision, recall, f1 = bert_scorer(
-        candidates,
-        references,
-        lang="en",
-        model_type=BERT_MODEL_TYPE,
-        verbose=False
-    )
-
-    return precision.item(), recall.item(), f1.item()
\ No newline at end of file
+    return get_default_scorer().score([generated_report], [optimal_report])[0]
@@ -1,21 +1,115 @@
-from nltk.translate.bleu_score import sentence_bleu, SmoothingFunction
+from nltk.translate.bleu_score import Fraction, SmoothingFunction, brevity_penalty, closest_ref_length
+from nltk.util import ngrams
+from collections import Counter, OrderedDict
 from typing import Union, List
+import hashlib
+import math
 import re
 #import nltk
 #nltk.download('punkt')
-def calculate_bleu(generated_report: str, optimal_report: Union[str, List[str]]) -> float:
+
+_token_rx = re.compile(r'\b\w+\b')
+
+
+def tokenize(text: str) -> List[str]:
     # Simple tokenization: lowercase and split on spaces and punctuation
-    tokenize = lambda text: re.findall(r'\b\w+\b', text.lower())
+    return _token_rx.findall(text.lower())
+
+
+class BleuScorer:
+    """
+    Sentence/corpus BLEU with the same results as NLTK's sentence_bleu and
+    corpus_bleu, but reference tokens and n-gram counts are computed once per
+    reference (cached by hash), so scoring many candidates against the same
+    reference only counts the candidates' n-grams.
+    """
+
+    def __init__(self, weights=(0.25, 0.25, 0.25, 0.25), smoothing_function=None, max_cached_references: int = 256):
+        self.weights = weights
+        # Using SmoothingFunction().method1 is a common choice
+        self.smoothing_function = smoothing_function or SmoothingFunction().method1
+        self.max_cached_references = max_cached_references
+        self._references = OrderedDict()
+
+    def _reference_stats(self, optimal_report: Union[str, List[str]]):
+        """Returns (tokenized references, {n: max n-gram counts over the references})."""
+        texts = [optimal_report] if isinstance(optimal_report, str) else list(optimal_report)
+        key = hashlib.sha1(repr(texts).encode('utf-8')).hexdigest()
 
-    candidate = tokenize(generated_report)
+        stats = self._references.get(key)
+        if stats is None:
+            references = [tokenize(text) for text in texts]
+            max_counts = {}
+            for n in range(1, len(self.weights) + 1):
+                merged = Counter()
+                for reference in references:
+                    if len(reference) >= n:
+                        merged |= Counter(ngrams(reference, n))
+                max_counts[n] = merged
+            stats = (references, max_counts)
+            self._references[key] = stats
+            while len(self._references) > self.max_cached_references:
+                self._references.popitem(last=False)
+        else:
+            self._references.move_to_end(key)
+        return stats
 
-    if isinstance(optimal_report, str):
-        references = [tokenize(optimal_report)]
-    else:
-        references = [tokenize(ref) for ref in optimal_report]
+    def _precision_counts(self, hypothesis, max_counts):
+        """Numerator and denominator of modified_precision for every n-gram order."""
+        counts = []
+        for n in range(1, len(self.weights) + 1):
+            hyp_counts = Counter(ngrams(hypothesis, n)) if len(hypothesis) >= n else Counter()
+            ref_counts = max_counts[n]
+            numerator = sum(min(count, ref_counts.get(ngram, 0)) for ngram, count in hyp_counts.items())
+            denominator = max(1, sum(hyp_counts.values()))
+            counts.append((numerator, denominator))
+        return counts
 
-    # Using SmoothingFunction().method1 is a common choice
-    smoothing = SmoothingFunction().method1
+    def _bleu(self, numerators, denominators, hyp_lengths, ref_lengths, references, hypothesis) -> float:
+        bp = brevity_penalty(ref_lengths, hyp_lengths)
+        p_n = [Fraction(num, den, _normalize=False) for num, den in zip(numerators, denominators)]
+        if numerators[0] == 0:
+            return 0
+        p_n = self.smoothing_function(p_n, references=references, hypothesis=hypothesis, hyp_len=hyp_lengths)
+        s = (w_i * math.log(p_i) for w_i, p_i in zip(self.weights, p_n) if p_i > 0)
+        return bp * math.exp(math.fsum(s))
 
-    bleu_score = sentence_bleu(references, candidate, smoothing_function=smoothing)
-    return bleu_score
\ No newline at end of file
+    def score_many(self, generated_reports: List[str], optimal_report: Union[str, List[str]]) -> List[float]:
+        """Sentence BLEU of every generated report against the same reference(s)."""
+        references, max_counts = self._reference_stats(optimal_report)
+        scores = []
+        for generated_report in generated_reports:
+            candidate = tokenize(generated_report)
+            numerators, denominators = zip(*self._precision_counts(candidate, max_counts))
+            ref_len = closest_ref_length(references, len(candidate))
+            scores.append(self._bleu(numerators, denominators, len(candidate), ref_len, references, candidate))
+        return scores
+
+    def score(self, generated_report: str, optimal_report: Union[str, List[str]]) -> float:
+        return self.score_many([generated_report], optimal_report)[0]
+
+    def corpus_score(self, generated_reports: List[str], optimal_reports: List[Union[str, List[str]]]) -> float:
+        """Corpus BLEU over generated/optimal report pairs, e.g. the final outputs of all ranks."""
+        if len(generated_reports) != len(optimal_reports):
+            raise ValueError("The number of generated reports and their reference(s) should be the same.")
+
+        numerators = [0] * len(self.weights)
+        denominators = [0] * len(self.weights)
+        hyp_lengths, ref_lengths = 0, 0
+        references, candidate = [], []
+        for generated_report, optimal_report in zip(generated_reports, optimal_reports):
+            references, max_counts = self._reference_stats(optimal_report)
+            candidate = tokenize(generated_report)
+            for i, (num, den) in enumerate(self._precision_counts(candidate, max_counts)):
+                numerators[i] += num
+                denominators[i] += den
+            hyp_lengths += len(candidate)
+            ref_lengths += closest_ref_length(references, len(candidate))
+        return self._bleu(numerators, denominators, hyp_lengths, ref_lengths, references, candidate)
+
+
+_default_scorer = BleuScorer()
+
+
+def calculate_bleu(generated_report: str, optimal_report: Union[str, List[str]]) -> float:
+    return _default_scorer.score(generated_report, optimal_report)
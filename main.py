@@ -1,10 +1,16 @@
+import argparse
 import threading
-import itertools
-import sys
 import time
 from datetime import datetime
-from Data.readData import get_final_traffic_text, get_real_traffic_report, analyze_reports
-from LLMs.gemy import chat_with_gemini
+from Data.analysisReport import load_analysis_report, records_path, save_report_records
+from Data.readData import get_final_traffic_text, get_real_traffic_report, analyze_reports, match_counts
+from LLMs.gemy import chat_with_gemini, client as gemini_client, response_cache
+from LLMs.batching import DynamicBatcher
+from LLMs.modelClient import ModelClient
+from Pipeline.checkpoint import RunCheckpoint, new_run_id
+from Pipeline.critic import CRITIC_GRACE, CriticPipeline
+from Pipeline.results import ResultsWriter, result_record
+from Pipeline.scheduler import RankScheduler
 from Scores.bert import calculate_bert
 from Scores.bleu import calculate_bleu
 import pandas as pd
@@ -52,41 +58,13 @@ Na podlagi vhodnih podatkov oblikuj kratke, informativne prometne novice, kot bi
 '''
 
 
-def spinner(text, stop_event):
-    for c in itertools.cycle('|/-\\'):
-        if stop_event.is_set():
-            break
-        sys.stdout.write(f'\r{text} {c}')
-        sys.stdout.flush()
-        time.sleep(0.1)
-    sys.stdout.write('\r' + ' ' * (len(text) + 2) + '\r')  # Clear line
-
-
-def parse_report(full_text: str, report_n: int):
-    pattern = re.compile(
-        fr"---------- RANK {report_n} ----------\n"
-        r"TIMESTAMP:\s*(.*?)\n"
-        r"SIMILARITY SCORE:.*?\n"
-        fr"--- GENERATED REPORT for RANK {report_n} \(from Excel\) ---\n"
-        r"(.*?)\n"
-        fr"--- REAL REPORT for RANK {report_n} \(from RTF\) ---\n"
-        r"(.*)",
-        re.DOTALL
-    )
-    match = pattern.search(full_text)
-
-    if match:
-        timestamp = match.group(1).strip()
-        generated = match.group(2).strip()
-        real = match.group(3).strip()
-
-        if '----------' in real:
-            real = real.split('----------')[0].strip()
-
-        return generated, real, timestamp
-    else:
-        return None, None, None
-
+# Ranks from the analysis report improved per run, and improvement iterations per rank
+DEFAULT_RANKS = 10
+ITERATIONS = 5
+# The analysis report find_good_reports writes and step_one reads, with its ranks in the .jsonl next to it
+ANALYSIS_START = "2023-01-01 00:00:00"
+ANALYSIS_END = "2023-12-31 23:59:59"
+ANALYSIS_REPORT = f"Data/analysis_report-[{ANALYSIS_START[:10]}][{ANALYSIS_END[:10]}]-1000-chars.txt"
 
 def parse_gemini_ratings(text: str) -> dict:
     ratings = {}
@@ -106,103 +84,42 @@ def parse_gemini_ratings(text: str) -> dict:
     return ratings
 
 
-def run_automated_improvement(model_name: str, report_context: str):
-    global default_custom_instructions
-    # Create Logs directory if it doesn't exist
-    if not os.path.exists("Logs"):
-        os.makedirs("Logs")
-    results_filename = f"Logs/detailed_log_{model_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
-
-    # Outer loop for the top 10 reports
-    for report_n in range(1, 11):
-        print(f"\n{'=' * 20} PROCESSING REPORT RANK {report_n}/10 {'=' * 20}")
-
-        traffic_report, optimal_traffic_report, timestamp = parse_report(report_context, report_n)
-
-        if not traffic_report or not optimal_traffic_report:
-            print(f"Could not parse data for RANK {report_n}. Skipping.")
-            continue
+def load_chat_function(model_name: str):
+    """
+    Uses a running LLMs.modelServer for the model if there is one, otherwise
+    loads the model in-process. Either way, ranks that generate at the same
+    time are batched together.
+    """
+    client = ModelClient()
+    if client.is_ready(model_name):
+        print(f"Using {model_name} from the model server at {client.url}")
+        return client.chat_with_gams if model_name == "gams" else client.chat_with_gemma_stateless
+
+    # Dynamically import the required model to avoid loading both
+    if model_name == "gams":
+        from LLMs.gaMS import chat_with_gams_batch as chat_batch
+    else:
+        from LLMs.gemma import chat_with_gemma_batch as chat_batch
+    batcher = DynamicBatcher(chat_batch)
+    return lambda prompt, instructions: batcher.submit(prompt, instructions).result()
 
-        with open(results_filename, 'a', encoding='utf-8') as f:
-            f.write(f"\n\n{'=' * 80}\n")
-            f.write(f"STARTING ANALYSIS FOR REPORT RANK: {report_n} | TIMESTAMP: {timestamp}\n")
-            f.write(f"INPUT DATA:\n{traffic_report}\n")
-            f.write(f"{'=' * 80}\n")
-
-        current_instructions = default_custom_instructions
-
-        # Inner loop for 5 iterations of instruction improvement
-        for iteration in range(1, 6):
-            # --- Start Timing ---
-            start_time = time.time()
-            print(f"--- Iteration {iteration}/5 ---")
-
-            stop_event = threading.Event()
-            spinner_text = f"Generating response with {model_name.upper()}"
-            spinner_thread = threading.Thread(target=spinner, args=(spinner_text, stop_event))
-            spinner_thread.start()
-
-            # Dynamically import the required model to avoid loading both
-            if model_name == "gams":
-                from LLMs.gaMS import chat_with_gams
-                model_response = chat_with_gams(traffic_report, current_instructions)
-            else:
-                from LLMs.gemma import chat_with_gemma_stateless
-                model_response = chat_with_gemma_stateless(traffic_report, current_instructions)
-
-            stop_event.set()
-            spinner_thread.join()
-
-            # --- Capture all BERT score components ---
-            bleu_score = calculate_bleu(model_response, optimal_traffic_report)
-            bert_precision, bert_recall, bert_f1 = calculate_bert(model_response, optimal_traffic_report)
-            print(f"  Scores -> BLEU: {bleu_score:.4f}, BERT F1: {bert_f1:.4f}, Precision: {bert_precision:.4f}, Recall: {bert_recall:.4f}")
 
-            new_instructions = "Error: Could not generate new instructions."
-            gemini_ratings = {}
-            if iteration < 5:
-                stop_event = threading.Event()
-                spinner_text = "Analyzing and improving instructions with Gemini"
-                spinner_thread = threading.Thread(target=spinner, args=(spinner_text, stop_event))
-                spinner_thread.start()
+def format_iteration_log(iteration: int, start_time: float, end_time: float, stage_times: dict, model_response: str,
+                         scores: tuple, gemini_ratings: dict, new_instructions: str) -> str:
+    """The log block of one finished iteration."""
+    duration = end_time - start_time
+    iteration_end_timestamp = datetime.fromtimestamp(end_time).strftime('%Y-%m-%d %H:%M:%S')
+    bleu_score, bert_precision, bert_recall, bert_f1 = scores
+    stage_breakdown = " | ".join(f"{name}: {seconds:.2f} s" for name, seconds in stage_times.items())
 
-                try:
-                    response_gemini = chat_with_gemini(current_instructions, traffic_report, model_response)
-                    new_instructions = response_gemini.split("$")[1].strip()
-                    gemini_ratings = parse_gemini_ratings(response_gemini)
-                    print("RESPONSE GEMINI:")
-                    print(response_gemini)
-                    print("  Instructions improved for next iteration.")
-                except IndexError:
-                    new_instructions = "# WARNING: Could not parse new instructions from Gemini's response. Re-using previous set. #"
-                    print(f"  {new_instructions}")
-                except Exception as e:
-                    new_instructions = f"# ERROR: An exception occurred during instruction improvement: {e} #"
-                    print(f"  {new_instructions}")
-
-                stop_event.set()
-                spinner_thread.join()
-            else:
-                new_instructions = "# FINAL ITERATION: No new instructions generated. #"
-                # Still get the final ratings
-                response_gemini = chat_with_gemini(current_instructions, traffic_report, model_response)
-                gemini_ratings = parse_gemini_ratings(response_gemini)
-
-            # --- End Timing and Calculate Duration ---
-            end_time = time.time()
-            duration = end_time - start_time
-            iteration_end_timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-
-            if "WARNING" not in new_instructions and "ERROR" not in new_instructions:
-                current_instructions = new_instructions
-
-            log_block = f"""
+    return f"""
 --------------------------------------------------------------------------------
 ITERATION: {iteration} | FINISHED AT: {iteration_end_timestamp}
 --------------------------------------------------------------------------------
 
 --- TIMING ---
 Time taken for this iteration: {duration:.2f} seconds
+Per stage: {stage_breakdown}
 
 --- MODEL OUTPUT ---
 {model_response}
@@ -223,19 +140,239 @@ Generalna:                    {gemini_ratings.get("Generalna", "Not Found")}
 --- IMPROVED INSTRUCTIONS FOR NEXT ITERATION ---
 {new_instructions}
 """
-            with open(results_filename, 'a', encoding='utf-8') as f:
-                f.write(log_block)
+
+
+def improve_rank(report_n: int, report: dict, model_name: str, chat_with_model,
+                 scheduler: RankScheduler, critic: CriticPipeline, log: list, iterations: int = ITERATIONS,
+                 checkpoint: RunCheckpoint = None, done: list = (), results: ResultsWriter = None):
+    """
+    Runs the instruction-improvement iterations for one rank, appending its
+    log blocks to log. The last iteration's critique only gives ratings, so it
+    runs in the background: its log entry is a function that waits for the
+    ratings and returns the block.
+
+    Every finished iteration is recorded in checkpoint and results. done holds
+    the records of iterations a resumed run already finished; the rank
+    continues after them with the instructions they left.
+    """
+    traffic_report, optimal_traffic_report, timestamp = report["generated"], report["real"], report["timestamp"]
+
+    if not traffic_report or not optimal_traffic_report:
+        print(f"Could not parse data for RANK {report_n}. Skipping.")
+        return
+
+    log.append(
+        f"\n\n{'=' * 80}\n"
+        f"STARTING ANALYSIS FOR REPORT RANK: {report_n} | TIMESTAMP: {timestamp}\n"
+        f"INPUT DATA:\n{traffic_report}\n"
+        f"{'=' * 80}\n"
+    )
+
+    current_instructions = default_custom_instructions
+    for record in done:
+        log.append(record["log_block"])
+        current_instructions = record["next_instructions"]
+
+    def save_iteration(iteration, start_time, end_time, stage_times, model_response, scores, gemini_ratings,
+                       new_instructions, next_instructions, log_block):
+        if checkpoint is None:
+            return
+        bleu_score, bert_precision, bert_recall, bert_f1 = scores
+        fields = dict(
+            timestamp=timestamp,
+            finished_at=datetime.fromtimestamp(end_time).strftime('%Y-%m-%d %H:%M:%S'),
+            duration=end_time - start_time,
+            stage_times=stage_times,
+            instructions=current_instructions,
+            model_response=model_response,
+            scores={"bleu": bleu_score, "bert_precision": bert_precision, "bert_recall": bert_recall, "bert_f1": bert_f1},
+            gemini_ratings=gemini_ratings,
+            new_instructions=new_instructions,
+            next_instructions=next_instructions,
+            log_block=log_block,
+        )
+        checkpoint.record_iteration(report_n, iteration, **fields)
+        if results is not None:
+            results.append(result_record(checkpoint.run_id, model_name, report_n, iteration, fields))
+
+    # Iterations of instruction improvement
+    for iteration in range(len(done) + 1, iterations + 1):
+        # --- Start Timing ---
+        start_time = time.time()
+        stage_times = {}
+        print(f"[RANK {report_n}] --- Iteration {iteration}/{iterations}: generating with {model_name.upper()} ---")
+
+        with scheduler.stage("generate"):
+            model_response = chat_with_model(traffic_report, current_instructions)
+        stage_times["generate"] = time.time() - start_time
+
+        # --- Capture all BERT score components ---
+        stage_start = time.time()
+        with scheduler.stage("score"):
+            bleu_score = calculate_bleu(model_response, optimal_traffic_report)
+            bert_precision, bert_recall, bert_f1 = calculate_bert(model_response, optimal_traffic_report)
+        stage_times["score"] = time.time() - stage_start
+        scores = (bleu_score, bert_precision, bert_recall, bert_f1)
+        print(f"[RANK {report_n}]   Scores -> BLEU: {bleu_score:.4f}, BERT F1: {bert_f1:.4f}, Precision: {bert_precision:.4f}, Recall: {bert_recall:.4f}")
+
+        stage_start = time.time()
+        critique = critic.submit(current_instructions, traffic_report, model_response)
+
+        if iteration == iterations:
+            # Still get the final ratings, without holding up the next rank
+            final_instructions = "# FINAL ITERATION: No new instructions generated. #"
+            final = {}
+            final_done = threading.Event()
+
+            def on_final_critique(future, iteration=iteration, start_time=start_time, stage_start=stage_start,
+                                  stage_times=stage_times, model_response=model_response, scores=scores):
+                try:
+                    gemini_ratings = parse_gemini_ratings(future.result())
+                except Exception as e:
+                    print(f"[RANK {report_n}]   Final Gemini ratings failed: {e!r}")
+                    gemini_ratings = {}
+                try:
+                    # --- End Timing and Calculate Duration ---
+                    end_time = time.time()
+                    stage_times["critique"] = end_time - stage_start
+                    final["block"] = format_iteration_log(iteration, start_time, end_time, stage_times, model_response,
+                                                          scores, gemini_ratings, final_instructions)
+                    save_iteration(iteration, start_time, end_time, stage_times, model_response, scores, gemini_ratings,
+                                    final_instructions, current_instructions, final["block"])
+                finally:
+                    final_done.set()
+
+            def final_block(iteration=iteration, start_time=start_time, stage_times=stage_times,
+                            model_response=model_response, scores=scores):
+                try:
+                    critic.result(critique)
+                except Exception:
+                    pass
+                if not final_done.wait(1):
+                    # Timed out; the checkpoint is still recorded if the critique finishes later
+                    return format_iteration_log(iteration, start_time, time.time(), stage_times, model_response,
+                                                scores, {}, final_instructions)
+                return final["block"]
+
+            critique.add_done_callback(on_final_critique)
+            log.append(final_block)
+            break
+
+        new_instructions = "Error: Could not generate new instructions."
+        gemini_ratings = {}
+        try:
+            response_gemini = critic.result(critique)
+            new_instructions = response_gemini.split("$")[1].strip()
+            gemini_ratings = parse_gemini_ratings(response_gemini)
+            print(f"[RANK {report_n}] RESPONSE GEMINI:\n{response_gemini}\n[RANK {report_n}]   Instructions improved for next iteration.")
+        except IndexError:
+            new_instructions = "# WARNING: Could not parse new instructions from Gemini's response. Re-using previous set. #"
+            print(f"[RANK {report_n}]   {new_instructions}")
+        except Exception as e:
+            new_instructions = f"# ERROR: An exception occurred during instruction improvement: {e!r} #"
+            print(f"[RANK {report_n}]   {new_instructions}")
+        # --- End Timing and Calculate Duration ---
+        end_time = time.time()
+        stage_times["critique"] = end_time - stage_start
+
+        log_block = format_iteration_log(iteration, start_time, end_time, stage_times, model_response, scores,
+                                         gemini_ratings, new_instructions)
+        log.append(log_block)
+
+        next_instructions = current_instructions
+        if "WARNING" not in new_instructions and "ERROR" not in new_instructions:
+            next_instructions = new_instructions
+        save_iteration(iteration, start_time, end_time, stage_times, model_response, scores, gemini_ratings,
+                        new_instructions, next_instructions, log_block)
+        current_instructions = next_instructions
+
+
+def run_automated_improvement(model_name: str, reports: dict, n_ranks: int = DEFAULT_RANKS,
+                              iterations: int = ITERATIONS, stage_limits: dict = None, resume: str = None):
+    """
+    Improves the instructions for the top n_ranks reports ({rank: record} from
+    Data.analysisReport; all of them if n_ranks is None). Ranks run concurrently through a RankScheduler;
+    their log blocks are written in rank order once each rank is done.
+
+    Every iteration is checkpointed under Logs/runs/<run-id>. With resume set
+    to a run id, ranks already logged are skipped and the others continue
+    after their last finished iteration, appending to the same detailed log.
+    """
+    # Create Logs directory if it doesn't exist
+    if not os.path.exists("Logs"):
+        os.makedirs("Logs")
+
+    if resume:
+        checkpoint = RunCheckpoint.open(resume)
+        results_filename = checkpoint.settings["log_file"]
+        done, written = checkpoint.progress()
+        print(f"Resuming run '{resume}': {len(written)} ranks logged, "
+              f"{sum(len(records) for records in done.values())} iterations checkpointed.")
+    else:
+        run_id = new_run_id(model_name)
+        results_filename = f"Logs/detailed_log_{run_id}.txt"
+        checkpoint = RunCheckpoint.create(run_id, {
+            "model_name": model_name, "n_ranks": n_ranks, "iterations": iterations, "log_file": results_filename,
+        })
+        done, written = {}, set()
+        print(f"Run id: {run_id} (continue it with `python main.py --resume {run_id}` if interrupted)")
+    chat_with_model = load_chat_function(model_name)
+
+    ranks = sorted(reports)
+    if n_ranks is not None:
+        ranks = ranks[:n_ranks]
+    ranks = [report_n for report_n in ranks if report_n not in written]
+    print(f"\n{'=' * 20} PROCESSING {len(ranks)} REPORT RANKS {'=' * 20}")
+
+    scheduler = RankScheduler(stage_limits)
+    critic = CriticPipeline(chat_with_gemini, timeout=gemini_client.call_timeout + CRITIC_GRACE)
+    results = ResultsWriter(checkpoint.run_id)
+    # Iterations checkpointed by the interrupted run whose results were still buffered
+    written_results = results.written_keys()
+    for report_n, records in done.items():
+        for record in records:
+            if (report_n, record["iteration"]) not in written_results:
+                results.append(result_record(checkpoint.run_id, model_name, report_n, record["iteration"], record))
+    logs = {report_n: [] for report_n in ranks}
+
+    def write_log(report_n, _, error):
+        if error is not None:
+            print(f"RANK {report_n} failed: {error}")
+            logs[report_n].append(f"\n# ERROR: RANK {report_n} stopped with an exception: {error} #\n")
+        # Entries still waiting on background ratings are functions returning the block
+        text = "".join(entry() if callable(entry) else entry for entry in logs[report_n])
+        with open(results_filename, 'a', encoding='utf-8') as f:
+            f.write(text)
+        checkpoint.mark_written(report_n, complete=error is None)
+        print(f"RANK {report_n} done, log written.")
+
+    try:
+        scheduler.run(
+            ranks,
+            lambda report_n: improve_rank(report_n, reports[report_n], model_name, chat_with_model,
+                                          scheduler, critic, logs[report_n], iterations,
+                                          checkpoint, done.get(report_n, []), results),
+            on_done=write_log,
+        )
+    finally:
+        critic.close(cancel_pending=True)
+        results.close()
 
     print(f"\n{'=' * 20} AUTOMATED PROCESSING COMPLETE {'=' * 20}")
-    print(f"All scores and details logged to '{results_filename}'")
+    print("Time per stage (summed over ranks):")
+    print(scheduler.summary())
+    print(f"Gemini response cache: {response_cache.hits} hits, {response_cache.misses} misses")
+    usage = gemini_client.usage()
+    print(f"Gemini API: {usage['calls']} calls ({usage['retries']} retries), {usage['prompt_tokens']} prompt + "
+          f"{usage['output_tokens']} output tokens, {usage['mean_latency']:.2f} s per call")
+    print(f"All scores and details logged to '{results_filename}', results in '{results.path}'")
 
 
-def step_one():
-    filename = "Data/analysis_report-[2023-01-01][2023-12-31]-1000-chars.txt"
+def step_one(resume: str = None, n_ranks: int = DEFAULT_RANKS):
+    filename = ANALYSIS_REPORT
     try:
-        with open(filename, 'r', encoding='utf-8') as f:
-            report_context = f.read()
-        print(f"Successfully read content from '{filename}'")
+        reports = load_analysis_report(filename)
+        print(f"Successfully loaded {len(reports)} ranks of '{filename}'")
     except FileNotFoundError:
         print(f"Error: The file '{filename}' was not found. Please run `find_good_reports()` first.")
         return
@@ -243,6 +380,18 @@ def step_one():
         print(f"An error occurred while reading the file: {e}")
         return
 
+    if resume:
+        try:
+            settings = RunCheckpoint.open(resume).settings
+        except FileNotFoundError as e:
+            print(f"Error: {e}")
+            return
+        if n_ranks != settings["n_ranks"]:
+            print(f"Note: run '{resume}' continues with its own {settings['n_ranks']} ranks.")
+        run_automated_improvement(settings["model_name"], reports, settings["n_ranks"],
+                                  settings["iterations"], resume=resume)
+        return
+
     while True:
         model_input = input("Enter model to test ('gams' or 'gemma', or 'exit' to quit): ")
         print()
@@ -250,42 +399,51 @@ def step_one():
             print("Goodbye!")
             return
         if model_input.lower() in ["gams", "gemma"]:
-            run_automated_improvement(model_input.lower(), report_context)
+            run_automated_improvement(model_input.lower(), reports, n_ranks)
             break
         else:
             print("Invalid model input. Please enter 'gams' or 'gemma'.")
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Instruction Improvement Tool")
+    parser.add_argument("--resume", metavar="RUN_ID", help="continue an interrupted run from its checkpoints")
+    parser.add_argument("--ranks", metavar="N", type=int, default=DEFAULT_RANKS,
+                        help="number of top-ranked reports to improve (default: %(default)s)")
+    args = parser.parse_args()
+    if args.ranks < 1:
+        parser.error("--ranks must be at least 1")
+
     print("------------------------------------------------")
     print("------------------------------------------------")
     print("--------- Instruction Improvement Tool ---------")
     print("This tool automates the process of iteratively")
     print("improving instructions for a language model.")
     print("------------------------------------------------")
-    step_one()
+    step_one(args.resume, args.ranks)
 
 
 def find_good_reports():
-    start_analysis_date = "2023-01-01 00:00:00"
-    end_analysis_date = "2023-12-31 23:59:59"
-    report_quality_df = analyze_reports(start_analysis_date, end_analysis_date)
+    start_analysis_date = ANALYSIS_START
+    end_analysis_date = ANALYSIS_END
+    report_quality_df = analyze_reports(start_analysis_date, end_analysis_date, top_k=100)
     if not report_quality_df.empty:
+        # Counts of the whole range; only the top 100 rows are returned
+        counts = match_counts(report_quality_df)
         report_quality_df = report_quality_df.sort_values(by='hash_similarity', ascending=False)
         report_quality_df.reset_index(drop=True, inplace=True)
         print("\n--- Ultra-Fast Analysis Results ---")
         print("\n--- Top 10 Best Matches ---")
         print(report_quality_df[['timestamp', 'hash_similarity']].head(10))
-        start_date_str_for_filename = datetime.strptime(start_analysis_date, "%Y-%m-%d %H:%M:%S").strftime("%Y-%m-%d")
-        end_date_str_for_filename = datetime.strptime(end_analysis_date, "%Y-%m-%d %H:%M:%S").strftime("%Y-%m-%d")
-        output_filename = f"analysis_report-[{start_date_str_for_filename}][{end_date_str_for_filename}].txt"
+        output_filename = ANALYSIS_REPORT
         print(f"\nGenerating detailed text report to '{output_filename}'...")
         try:
             with open(output_filename, 'w', encoding='utf-8') as f:
                 f.write(f"ANALYSIS REPORT\n")
                 f.write(f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
                 f.write(f"Data Analyzed From: {start_analysis_date} to {end_analysis_date}\n")
-                f.write(f"Number of reports analyzed: {len(report_quality_df)}\n")
+                f.write(f"Number of reports analyzed: {counts['unique']}\n")
+                f.write(f"Matched report pairs: {counts['matched']} ({counts['kept']} after the length filter)\n")
                 f.write("=" * 80 + "\n\n")
                 f.write("--- TOP 100 BEST MATCHES (HIGHEST SIMILARITY) ---\n")
                 f.write("=" * 80 + "\n")
@@ -300,6 +458,8 @@ def find_good_reports():
                     f.write(f"{row['real_report']}\n")
                     f.write("-" * (len("---------- RANK 1 ----------")) + "\n")
             print(f"Successfully saved report to '{output_filename}'")
+            save_report_records(records_path(output_filename), top_100_best)
+            print(f"Ranks for step_one saved to '{records_path(output_filename)}'")
         except Exception as e:
             print(f"Error: Could not write to file '{output_filename}'. Reason: {e}")
     else: